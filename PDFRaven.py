@@ -7,10 +7,11 @@ Description: A multi-process, database-backed PDF cracker with TUI elements.
 """
 
 import argparse
-import concurrent.futures
 import itertools
+import mmap
 import string
 import sys
+import threading
 import time
 import os
 import re
@@ -24,6 +25,8 @@ from datetime import datetime
 # --- Configuration & Constants ---
 DB_FILE = "found_passwords.json"
 VERSION = "2.0.0"
+CUSTOM_QUERY_RE = re.compile(r'(.*)\{(\d+)-(\d+)\}(.*)')
+QUERY_RANGE_RE = re.compile(r'\{(\d+)-(\d+)\}')
 
 # --- ANSI Colors ---
 class Colors:
@@ -40,6 +43,7 @@ class Colors:
 try:
     import pikepdf
     from tqdm import tqdm
+    from pdfraven import pdf_hash
 except ImportError:
     print(f"{Colors.FAIL}[CRITICAL] Missing dependencies.{Colors.ENDC}")
     print(f"Please run: {Colors.BOLD}pip install -r requirements.txt{Colors.ENDC}")
@@ -157,114 +161,186 @@ def check_db_for_password(pdf_path, verbose):
 
 # --- Core Cracking Logic ---
 
-def attempt_crack_batch(args):
-    pdf_path, passwords = args
+# Per-process worker state, set once by init_worker
+_pdf_path = None
+_encryption = None
+_verify = None
+
+def init_worker(pdf_path, encryption):
+    global _pdf_path, _encryption, _verify
+    _pdf_path = pdf_path
+    _encryption = encryption
+    # Specialized once for this file's revision and hash constants
+    _verify = pdf_hash.make_verifier(encryption) if encryption is not None else None
+
+def attempt_crack_batch(passwords):
+    if _encryption is not None:
+        # Verify against the /O and /U hashes directly, no re-parsing
+        return _verify([pdf_hash.encode_password(p) for p in passwords]), len(passwords)
     # Suppress QPDF warnings implicitly by not configuring logger
     for password in passwords:
         try:
-            with pikepdf.open(pdf_path, password=password, allow_overwriting_input=True) as pdf:
-                return password
+            with pikepdf.open(_pdf_path, password=password) as pdf:
+                return pdf_hash.encode_password(password), len(passwords)
         except pikepdf.PasswordError:
             continue
         except Exception:
             continue
-    return None
+    return None, len(passwords)
+
+def attempt_crack_timed(passwords):
+    """attempt_crack_batch plus the seconds it took, for re-tuning the batch size."""
+    started = time.perf_counter()
+    found, tried = attempt_crack_batch(passwords)
+    return found, tried, time.perf_counter() - started
+
+def tuned_batch_size(seconds, tried):
+    """Batch size that would have taken ~100 ms at the measured rate."""
+    if seconds <= 0 or tried <= 0:
+        return 100_000
+    return max(64, min(100_000, int(0.1 * tried / seconds)))
 
 # --- Dispatcher Template ---
 
 def run_attack(attack_name, generator, total_est, pdf_path, workers, batch_size, verbose):
     log(f"Initializing {attack_name} with {workers} workers...", "INFO", 1, verbose)
     
-    pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
-    futures = []
+    try:
+        encryption = pdf_hash.read_encryption(pdf_path)
+        log(f"Verifying passwords in-process (security handler R={encryption.R})", "INFO", 1, verbose)
+    except (OSError, ValueError) as e:
+        encryption = None
+        log(f"Could not read encryption dictionary ({e}), using pikepdf", "WARN", 1, verbose)
+
+    iterator = iter(generator)
+    found_password = None
+    probed = 0
+    
+    # Size batches to ~100 ms each from a timed probe of the first 256 candidates
+    auto_tune = batch_size is None
+    if auto_tune:
+        probe = list(itertools.islice(iterator, 256))
+        init_worker(pdf_path, encryption)
+        probe_start = time.perf_counter()
+        found_password, probed = attempt_crack_batch(probe) if probe else (None, 0)
+        batch_size = tuned_batch_size(time.perf_counter() - probe_start, probed)
+        log(f"Auto-tuned batch size to {batch_size} passwords", "INFO", 2, verbose)
+        if found_password:
+            return found_password
+    
+    # Several batches per task on long attacks with a fixed batch size, so IPC
+    # round trips stay rare. Tuned batches already run ~100 ms each; grouping
+    # them only delays reporting a hit and makes terminate() stall on large
+    # pickled chunks.
+    chunksize = 1
+    if not auto_tune:
+        chunksize = max(1, min(64, (total_est or 0) // batch_size // (workers * 4)))
+    
+    # imap_unordered drains the generator from a helper thread; keep at most
+    # four tasks per worker queued
+    throttle = threading.Semaphore(workers * 4 * chunksize)
+    stopping = threading.Event()
+    
+    def batches():
+        # Reads batch_size on every batch, so re-tuning takes effect immediately
+        while not stopping.is_set():
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            while not throttle.acquire(timeout=0.1):
+                if stopping.is_set():
+                    return
+            yield batch
     
     start_time = time.time()
     
     # Progress Bar
-    pbar = tqdm(total=total_est, unit="pw", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]")
-    
-    found_password = None
+    pbar = tqdm(total=total_est, initial=probed, unit="pw", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]")
     
+    pool = multiprocessing.Pool(workers, initializer=init_worker, initargs=(pdf_path, encryption))
+    # Re-tune from the workers' own timings every 10 results
+    window_seconds = window_tried = window_results = 0
     try:
-        batch = []
-        for pwd in generator:
-            batch.append(pwd)
-            if len(batch) >= batch_size:
-                futures.append(pool.submit(attempt_crack_batch, (pdf_path, batch)))
-                batch = []
-                
-                # Memory management
-                if len(futures) > workers * 10:
-                    done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
-                    for future in done:
-                        res = future.result()
-                        pbar.update(batch_size) 
-                        if res:
-                            found_password = res
-                            pool.shutdown(wait=False, cancel_futures=True)
-                            break
-                        futures.remove(future)
-            
-            if found_password: break
-            
-        # Submit final batch
-        if batch and not found_password:
-            futures.append(pool.submit(attempt_crack_batch, (pdf_path, batch)))
-            
-        # Drain remaining
-        if not found_password:
-            for future in concurrent.futures.as_completed(futures):
-                res = future.result()
-                pbar.update(batch_size) # Approximation for visualization
-                if res:
-                    found_password = res
-                    pool.shutdown(wait=False, cancel_futures=True)
-                    break
-                    
+        for res, tried, elapsed in pool.imap_unordered(attempt_crack_timed, batches(), chunksize):
+            throttle.release()
+            pbar.update(tried)
+            if res:
+                found_password = res
+                break
+            if auto_tune:
+                window_seconds += elapsed
+                window_tried += tried
+                window_results += 1
+                if window_results == 10:
+                    batch_size = tuned_batch_size(window_seconds, window_tried)
+                    window_seconds = window_tried = window_results = 0
     except KeyboardInterrupt:
         pbar.close()
-        pool.shutdown(wait=False, cancel_futures=True)
         raise
+    finally:
+        stopping.set()
+        pool.terminate()
         
     pbar.close()
     return found_password
 
 # --- Attack Generators ---
 
-def gen_wordlist(path):
-    with open(path, 'r', encoding='latin-1', errors='ignore') as f:
-        for line in f:
-            yield line.strip()
+def count_lines(path, chunk_size=64 << 20):
+    # Counted on an mmap a slice at a time; a last line without '\n' counts too
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            count = sum(mm[i:i + chunk_size].count(b'\n') for i in range(0, size, chunk_size))
+            return count + (mm[size - 1] != ord('\n'))
+
+def gen_wordlist(path, chunk_size=4 << 20):
+    # Binary blocks split with bytes.split; entries stay bytes and only the
+    # line ending is removed, so spaces that belong to a password are kept
+    tail = b''
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            data = tail + chunk
+            lines = data.split(b'\n')
+            tail = lines.pop()  # Partial line, completed by the next block
+            # Check the joined data: a CRLF split across blocks has its \r in tail
+            if b'\r' in data:
+                lines = [line.rstrip(b'\r') for line in lines]
+            yield from lines
+    if tail:
+        yield tail.rstrip(b'\r')
 
 def gen_range(start, end):
-    for i in range(start, end + 1):
-        yield str(i)
+    return map(str, range(start, end + 1))
 
 def gen_numeric(length):
-    limit = 10 ** length
-    for i in range(limit):
-        yield f"{i:0{length}d}"
+    return map(f"{{:0{length}d}}".format, range(10 ** length))
+
+# Every DDMM of a leap year in calendar order; other years skip 29 February
+DAYMONTH_LEAP = [f"{d:02d}{m:02d}".encode() for m in range(1, 13) for d in range(1, calendar.monthrange(2000, m)[1] + 1)]
+DAYMONTH = [dm for dm in DAYMONTH_LEAP if dm != b"2902"]
 
 def gen_date(start, end):
     for year in range(start, end + 1):
-        for month in range(1, 13):
-            _, num_days = calendar.monthrange(year, month)
-            for day in range(1, num_days + 1):
-                yield f"{day:02d}{month:02d}{year}"
+        y = str(year).encode()
+        for dm in (DAYMONTH_LEAP if calendar.isleap(year) else DAYMONTH):
+            yield dm + y
 
 def gen_custom(query, add_zeros):
-    match = re.search(r'(.*)\{(\d+)-(\d+)\}(.*)', query)
+    match = CUSTOM_QUERY_RE.search(query)
     if not match: return
     prefix, start, end, suffix = match.group(1), int(match.group(2)), int(match.group(3)), match.group(4)
     width = len(match.group(3)) if add_zeros else 0
+    # Candidates are built as bytes; a width of 0 means no padding
+    prefix, suffix = pdf_hash.encode_password(prefix), pdf_hash.encode_password(suffix)
     for i in range(start, end + 1):
-        num = f"{i:0{width}d}" if add_zeros else str(i)
-        yield f"{prefix}{num}{suffix}"
+        yield prefix + (b"%0*d" % (width, i)) + suffix
 
 def gen_brute(min_l, max_l, charset):
     for length in range(min_l, max_l + 1):
-        for p in itertools.product(charset, repeat=length):
-            yield "".join(p)
+        yield from map("".join, itertools.product(charset, repeat=length))
 
 # --- Main ---
 
@@ -349,7 +425,7 @@ def main():
             # Count lines for progress bar
             log("Counting lines in wordlist...", "INFO", 1, args.verbose)
             try:
-                est_total = sum(1 for _ in open(args.wordlist_path, 'rb'))
+                est_total = count_lines(args.wordlist_path)
             except: est_total = None
             gen = gen_wordlist(args.wordlist_path)
             
@@ -366,7 +442,7 @@ def main():
             gen = gen_date(args.start_year, args.end_year)
             
         elif args.command == "custom-query":
-             match = re.search(r'\{(\d+)-(\d+)\}', args.query)
+             match = QUERY_RANGE_RE.search(args.query)
              if match: est_total = int(match.group(2)) - int(match.group(1)) + 1
              gen = gen_custom(args.query, args.add_preceding_zeros)
              
@@ -376,7 +452,7 @@ def main():
             gen = gen_brute(args.min_length, args.max_length, charset)
         
         try:
-            password = run_attack(args.command, gen, est_total, args.file, args.threads, 1000, args.verbose)
+            password = run_attack(args.command, gen, est_total, args.file, args.threads, None, args.verbose)
         except KeyboardInterrupt:
             print(f"\n{Colors.WARNING}Aborted by user.{Colors.ENDC}")
             sys.exit(0)
@@ -384,11 +460,12 @@ def main():
     # 4. Result Handling
     print("\n" + f"{Colors.BLUE}={Colors.ENDC}"*50)
     if password:
-        print(f"{Colors.GREEN} [SUCCESS] PASSWORD FOUND: {Colors.BOLD}{password}{Colors.ENDC}")
+        password_text = pdf_hash.display_password(password)
+        print(f"{Colors.GREEN} [SUCCESS] PASSWORD FOUND: {Colors.BOLD}{password_text}{Colors.ENDC}")
         print(f"{Colors.BLUE}={Colors.ENDC}"*50)
         
         # Save to DB
-        save_to_db(args.file, password)
+        save_to_db(args.file, password_text)
         log("Password saved to database.", "SUCCESS", 0, args.verbose)
         
         # Auto Decrypt
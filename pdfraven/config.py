@@ -7,7 +7,7 @@ VERSION = "3.2.0" # Updated version
 LOWERCASE = "abcdefghijklmnopqrstuvwxyz"
 UPPERCASE = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 DIGITS = "0123456789"
-SYMBOLS = "!@#$%^&*()-_+=~`[]{}|\:;"'<>,.?/"
+SYMBOLS = "!@#$%^&*()-_+=~`[]{}|\\:;\"'<>,.?/"
 WHITESPACE = " "
 HEX = "0123456789abcdef"
 
@@ -22,3 +22,9 @@ CHARSET_MAP = {
     'a': LOWERCASE + UPPERCASE + DIGITS + SYMBOLS + WHITESPACE,
 }
 
+# The same charsets as tuples of single bytes, for generators that emit
+# bytes (itertools.product over them yields bytes, not ints)
+CHARSET_MAP_BYTES = {
+    key: tuple(bytes((c,)) for c in charset.encode('ascii'))
+    for key, charset in CHARSET_MAP.items()
+}
@@ -1,105 +1,413 @@
 # pdfraven/cracker.py
-import concurrent.futures
-import pikepdf
+import itertools
+import multiprocessing
+import multiprocessing.pool
+import threading
 import time
+import pikepdf
+from . import gpu, pdf_hash
 from .ui import log, get_progress_bar
 from .database import save_session, clear_session
 
+# --- Worker State ---
+# Set once per worker process by _init_worker, so batches only carry passwords.
+_pdf_path = None
+_encryption = None
+_use_gpu = False
+_length_filter = None
+_stop_event = None
+_verify = None
+_stride_counts = None
+
+# Candidates verified between two checks of the stop event
+STOP_POLL_INTERVAL = 1024
+
+def _init_worker(pdf_path, encryption, use_gpu=False, length_filter=None, stop_event=None, stride_counts=None):
+    """
+    Stores the parsed encryption dictionary in the worker. When it is not
+    available, the pikepdf fallback opens the file at `pdf_path` instead.
+    `stop_event` is shared with the dispatcher, which sets it once the
+    attack is over so running batches bail out early. `stride_counts` is
+    the shared per-worker block counter used by attack_stride.
+    """
+    global _pdf_path, _encryption, _use_gpu, _length_filter, _stop_event, _verify, _stride_counts
+    _pdf_path = pdf_path
+    _encryption = encryption
+    _use_gpu = use_gpu
+    _length_filter = length_filter
+    _stop_event = stop_event
+    _stride_counts = stride_counts
+    if encryption is not None:
+        # Specialized once per worker for this document's revision and constants
+        _verify = gpu.make_verifier(encryption) if use_gpu else pdf_hash.make_verifier(encryption)
+
 # --- Core Cracking Worker ---
 
-def attempt_crack_batch(pdf_path, passwords):
+def attempt_crack_batch(passwords):
     """
-    Worker function that attempts to open a PDF with a batch of passwords.
-    This function is executed in a separate process.
+    Worker function that tests a batch of passwords against the target PDF.
+    A batch is a list of str/bytes or a 2D uint8 array with one password per
+    row. Returns (password or None, number of passwords in the batch), the
+    password as the bytes that opened the document. Candidates outside the
+    length filter are skipped but still count as tried. A batch interrupted
+    by the stop event reports 0 passwords tried.
+    Runs in a pool worker, which is a process or a thread.
     """
+    candidates = [pdf_hash.encode_password(p) for p in passwords]
+    if _length_filter is not None:
+        # A len() check is far cheaper than the hash it saves
+        lo, hi = _length_filter
+        candidates = [p for p in candidates if lo <= len(p) <= hi]
+
+    if _encryption is not None:
+        # Fast path: check the password hashes directly, no PDF parsing
+        # The GPU takes the whole batch in one launch; splitting it would only slow it down
+        step = max(1, len(candidates)) if _use_gpu else STOP_POLL_INTERVAL
+        for first in range(0, len(candidates), step):
+            if _stop_event is not None and _stop_event.is_set():
+                return None, 0
+            found = _verify(candidates[first:first + step])
+            if found is not None:
+                return found, len(passwords)
+        return None, len(passwords)
+
     # Suppress QPDF warnings by not configuring a logger here
-    for password in passwords:
+    for password in candidates:
+        # Each open costs milliseconds, so checking every time is free
+        if _stop_event is not None and _stop_event.is_set():
+            return None, 0
+        # Like the verifier, retry a UTF-8 password transcoded for R<=4 files
+        for variant in (password, pdf_hash.transcoded(password)):
+            if variant is None:
+                continue
+            try:
+                # allow_overwriting_input=True is critical for performance
+                with pikepdf.open(_pdf_path, password=variant, allow_overwriting_input=True):
+                    return variant, len(passwords)  # Password found
+            except pikepdf.PasswordError:
+                continue  # Wrong password
+            except Exception:
+                # Could be a malformed PDF or other issue
+                continue
+    return None, len(passwords)
+
+def attempt_crack_chunk(task):
+    """
+    Runs several batches as one pool task, like Pool's own chunksize, but
+    stops at the first hit. `task` is (index of its first candidate, batches).
+    Returns (index, password or None, passwords tried, seconds spent): the
+    index lets the dispatcher track which candidates are done, the timing
+    lets it re-tune the batch size.
+    """
+    index, batches = task
+    started = time.perf_counter()
+    tried = 0
+    for passwords in batches:
+        if _stop_event is not None and _stop_event.is_set():
+            break
+        found, count = attempt_crack_batch(passwords)
+        tried += count
+        if found:
+            return index, found, tried, time.perf_counter() - started
+    return index, None, tried, time.perf_counter() - started
+
+def attack_stride(task):
+    """
+    Long-running worker for striped attacks: worker `worker_id` of
+    `num_workers` takes blocks worker_id, worker_id + num_workers, ... of
+    `block_size` candidates from index `start`, and generates them itself
+    with the keyspace slice function (slice_fn(*args, lo, hi), see
+    generators.gen_numeric_slice), so no passwords cross the process
+    boundary. Finished blocks are counted in the worker's slot of the shared
+    counters. Returns the password, or None once its blocks run out or the
+    attack stops.
+    """
+    worker_id, num_workers, (slice_fn, args), start, total, block_size = task
+    block = worker_id
+    while not _stop_event.is_set():
+        first = start + block * block_size
+        if first >= total:
+            return None
+        for passwords in slice_fn(*args, first, min(first + block_size, total)):
+            found, _ = attempt_crack_batch(passwords)
+            if found:
+                return found
+        if _stop_event.is_set():
+            break  # The block may be incomplete, so it is not counted
+        _stride_counts[worker_id] += 1
+        block += num_workers
+    return None
+
+def _chunked(generator, size):
+    """Groups single passwords from `generator` into lists of `size`."""
+    iterator = iter(generator)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+# --- Verifier Choice ---
+# An R<=4 candidate costs over 150 MD5 calls and 60 RC4 passes in process,
+# which can lose to pikepdf's C code on small files (or without Numba), so
+# both are timed on the same wrong passwords before the attack.
+VERIFIER_PROBE_SIZE = 16
+
+def _in_process_is_faster(pdf_path, encryption):
+    """True if the in-process verifier beats pikepdf opens for this file; always true for R>=5."""
+    if encryption.R >= 5:
+        return True
+    probe = [b'\x00pdfraven-probe%d' % i for i in range(VERIFIER_PROBE_SIZE)]
+    verify = pdf_hash.make_verifier(encryption)
+    verify(probe[:1])  # Loads the Numba kernel outside the timing
+    started = time.perf_counter()
+    verify(probe)
+    in_process = time.perf_counter() - started
+    started = time.perf_counter()
+    for password in probe:
         try:
-            # allow_overwriting_input=True is critical for performance
             with pikepdf.open(pdf_path, password=password, allow_overwriting_input=True):
-                return password  # Password found
+                pass
         except pikepdf.PasswordError:
-            continue  # Wrong password
-        except Exception:
-            # Could be a malformed PDF or other issue
             continue
-    return None
+        except Exception:
+            # pikepdf cannot handle the file, so it is no alternative
+            return True
+    return in_process <= time.perf_counter() - started
+
+# --- Batch Size Tuning ---
+# Batches should run ~100 ms: long enough to amortize IPC, short enough that
+# the pool still balances load and stops promptly once a password is found.
+TARGET_BATCH_SECONDS = 0.1
+PROBE_BATCH_SIZE = 256
+MIN_BATCH_SIZE = 64
+MAX_BATCH_SIZE = 100_000
+RETUNE_INTERVAL = 10  # results between re-tunes
+STRIDE_POLL_SECONDS = 0.25  # progress refresh interval of striped attacks
+
+def _tuned_batch_size(seconds, tried):
+    """Batch size that would have taken TARGET_BATCH_SECONDS at the measured rate."""
+    if seconds <= 0 or tried <= 0:
+        return MAX_BATCH_SIZE
+    size = int(TARGET_BATCH_SECONDS * tried / seconds)
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, size))
 
 # --- Attack Dispatcher ---
 
-def run_attack(attack_name, generator, total_est, pdf_path, workers, batch_size, resume_pass, timeout=None):
+def run_attack(attack_name, generator, total_est, pdf_path, workers, batch_size, start=0, timeout=None, use_gpu=False,
+               batched=False, use_threads=False, length_filter=None, session_mode=None, stride=None):
+    """
+    Distributes candidates from `generator` across the worker pool. With
+    batched=True the generator yields ready-made batches (lists or uint8
+    arrays) instead of single passwords; oversized ones are split.
+    batch_size=None sizes batches from a timed probe and keeps re-tuning
+    them from the workers' measurements. use_threads=True runs the workers
+    as threads in this process instead of a process pool.
+    length_filter=(min, max) skips candidates by encoded length in bytes.
+    `generator` is expected to begin at candidate index `start`; when the
+    attack stops early, the number of candidates tried without a gap is
+    saved as the session cursor for `session_mode` (default: attack_name).
+    stride=(slice_fn, args) runs the attack as one attack_stride task per
+    worker, each generating its own blocks with slice_fn; `generator` then
+    only feeds the batch size probe, and total_est must be the exact
+    keyspace size.
+    """
     log(f"Initializing [bold]{attack_name}[/bold] attack with [bold]{workers}[/bold] workers...", "info")
     if timeout:
         log(f"Attack will run for a maximum of [bold]{timeout}[/bold] seconds.", "info")
 
-    pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
-    futures = []
-    
+    try:
+        encryption = pdf_hash.read_encryption(pdf_path)
+    except (OSError, ValueError) as e:
+        encryption = None
+        log(f"Could not read encryption dictionary ({e}). Falling back to pikepdf.", "warning")
+    else:
+        if _in_process_is_faster(pdf_path, encryption):
+            log(f"Using in-process password verification (security handler R={encryption.R}).", "info")
+        else:
+            log(f"pikepdf checks this file faster than in-process verification (R={encryption.R}). Using pikepdf.", "info")
+            encryption = None
+
+    if use_gpu and not (gpu.is_available() and gpu.supports(encryption)):
+        log("GPU mode needs CuPy, a CUDA device and an AES-256 (R=5/6) PDF. Using CPU workers.", "warning")
+        use_gpu = False
+
+    # Set once the attack is over: stops the feeder and makes workers drop
+    # their current batch instead of finishing it
+    stopping = multiprocessing.Event()
+
+    if use_gpu:
+        log("Verifying passwords on the GPU.", "info")
+        # A single host thread feeds the device; the kernel provides the parallelism
+        workers = 1
+
+    # Blocks finished by each striped worker, read here for progress and the session cursor
+    stride_counts = multiprocessing.Array('q', workers, lock=False) if stride else None
+    initargs = (pdf_path, encryption, use_gpu, length_filter, stopping, stride_counts)
+
+    if use_gpu:
+        pool = multiprocessing.pool.ThreadPool(1, initializer=_init_worker, initargs=initargs)
+    elif use_threads:
+        # No fork and no pickling of batches, but the workers share the GIL:
+        # hashlib drops it for large buffers, while pycryptodome's AES.new and
+        # the per-round Python code of every handler hold it. Processes stay
+        # the default for that reason.
+        log("Running workers as threads.", "info")
+        pool = multiprocessing.pool.ThreadPool(workers, initializer=_init_worker, initargs=initargs)
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs)
+
+    # The device wants the largest batches it can get, so only CPU runs are probed
+    auto_tune = batch_size is None and not use_gpu
+    if batch_size is None:
+        batch_size = PROBE_BATCH_SIZE if auto_tune else MAX_BATCH_SIZE
+
+    def batches():
+        # Reads batch_size on every batch, so re-tuning takes effect immediately
+        if batched:
+            for item in generator:
+                start = 0
+                while start < len(item):
+                    yield item[start:start + batch_size]
+                    start += batch_size
+        else:
+            iterator = iter(generator)
+            while True:
+                batch = list(itertools.islice(iterator, batch_size))
+                if not batch:
+                    return
+                yield batch
+
+    source = batches()
     progress = get_progress_bar()
-    task_id = progress.add_task("[cyan]Cracking...", total=total_est)
-    
+    task_id = progress.add_task("[cyan]Cracking...", total=total_est, completed=start)
+
+    # The pool drains `tasks` from a helper thread, so bound how far it may run ahead
+    throttle = threading.Semaphore(workers * 4)
+    chunksize = 1
+    dispatched = start
+
+    def tasks():
+        nonlocal dispatched
+        for chunk in _chunked(source, chunksize):
+            while not throttle.acquire(timeout=0.1):
+                if stopping.is_set():
+                    return
+            if stopping.is_set():
+                return
+            yield dispatched, chunk
+            dispatched += sum(len(batch) for batch in chunk)
+
+    # Results arrive out of order; the cursor only moves past finished tasks
+    # that leave no gap behind them
+    cursor = start
+    finished = {}
+
+    def complete(index, tried):
+        nonlocal cursor
+        finished[index] = tried
+        while cursor in finished:
+            cursor += finished.pop(cursor)
+
     found_password = None
-    last_checked_password = resume_pass
-    
-    start_time = time.time()
+    interrupted = False
+    deadline = time.time() + timeout if timeout else None
+
     progress.start()
     try:
-        batch = []
-        for pwd in generator:
-            batch.append(pwd)
-            last_checked_password = pwd
-            
-            if len(batch) >= batch_size:
-                futures.append(pool.submit(attempt_crack_batch, pdf_path, batch))
-                batch = []
-                
-                # Throttle submission to avoid memory issues
-                if len(futures) >= workers * 5:
-                    # Wait for the first future to complete
-                    done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
-                    for future in done:
-                        res = future.result()
-                        progress.update(task_id, advance=batch_size)
-                        if res:
-                            found_password = res
-                            break
-                        futures.remove(future)
-            
-            if found_password:
-                break
-            
-            if timeout and (time.time() - start_time) > timeout:
-                log("\n[warning]Attack timed out.[/warning]", "warning")
-                break
-        
-        # Submit final batch
-        if batch and not found_password:
-            futures.append(pool.submit(attempt_crack_batch, pdf_path, batch))
-            
-        # Process remaining futures
-        if not found_password:
-            # Calculate remaining time if a timeout is set
-            remaining_time = timeout - (time.time() - start_time) if timeout else None
-            
-            for future in concurrent.futures.as_completed(futures, timeout=remaining_time):
-                res = future.result()
-                progress.update(task_id, advance=batch_size)
-                if res:
-                    found_password = res
+        if auto_tune:
+            # Time the first batch here; it is real work, so it counts as tried
+            probe = next(source, None)
+            if probe is not None:
+                # Same state as the workers; thread workers share these globals
+                _init_worker(*initargs)
+                _, found_password, tried, elapsed = attempt_crack_chunk((dispatched, [probe]))
+                dispatched += len(probe)
+                complete(start, tried)
+                progress.update(task_id, advance=tried)
+                batch_size = _tuned_batch_size(elapsed, tried)
+                log(f"Auto-tuned batch size to [bold]{batch_size:,}[/bold] passwords per batch.", "info")
+
+        # Hand each worker several batches per round trip on long attacks. The
+        # chunks are built here rather than via imap_unordered's chunksize, which
+        # would return a plain generator without next(timeout=...). Tuned batches
+        # already run ~100 ms each, so grouping those would only make tasks slow
+        # to finish and to cancel.
+        if total_est and not batched and not auto_tune:
+            chunksize = max(1, min(64, total_est // batch_size // (workers * 4)))
+
+        if stride is not None and not found_password:
+            # One task per worker, each enumerating its own blocks of the keyspace
+            first = dispatched
+            stripes = [(worker_id, workers, stride, first, total_est, batch_size) for worker_id in range(workers)]
+            results = pool.imap_unordered(attack_stride, stripes)
+            running = workers
+            while running and not found_password:
+                wait = STRIDE_POLL_SECONDS
+                if deadline is not None:
+                    wait = min(wait, deadline - time.time())
+                    if wait <= 0:
+                        raise multiprocessing.TimeoutError()
+                try:
+                    found_password = results.next(timeout=wait)
+                    running -= 1
+                except multiprocessing.TimeoutError:
+                    pass
+                # Worker w has finished blocks w, w + workers, ...; everything
+                # before the lowest block still missing is done
+                done = list(stride_counts)
+                remaining_total = total_est - first
+                progress.update(task_id, completed=first + min(remaining_total, sum(done) * batch_size))
+                lowest_missing = min(worker_id + count * workers for worker_id, count in enumerate(done))
+                cursor = first + min(remaining_total, lowest_missing * batch_size)
+        elif stride is None:
+            results = pool.imap_unordered(attempt_crack_chunk, tasks())
+            window_seconds = window_tried = window_results = 0
+            while not found_password:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise multiprocessing.TimeoutError()
+                try:
+                    index, res, tried, elapsed = results.next(timeout=remaining)
+                except StopIteration:
                     break
+                throttle.release()
+                complete(index, tried)
+                progress.update(task_id, advance=tried)
+                found_password = res
+
+                if auto_tune:
+                    window_seconds += elapsed
+                    window_tried += tried
+                    window_results += 1
+                    if window_results == RETUNE_INTERVAL:
+                        batch_size = _tuned_batch_size(window_seconds, window_tried)
+                        window_seconds = window_tried = window_results = 0
     
-    except concurrent.futures.TimeoutError:
+    except multiprocessing.TimeoutError:
         log("\n[warning]Attack timed out.[/warning]", "warning")
     except (KeyboardInterrupt, SystemExit):
+        interrupted = True
         log("\n[warning]Attack aborted by user. Saving session...[/warning]")
     finally:
+        stopping.set()
         progress.stop()
-        pool.shutdown(wait=False, cancel_futures=True)
+        # The stop event ends every running task within a batch, so the pool
+        # can wind down on its own. terminate() can deadlock when it kills a
+        # worker process halfway through posting a result, so it is kept for
+        # Ctrl-C, which also interrupts the workers themselves.
+        if interrupted:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
 
     # Session saving logic
     if found_password:
         clear_session(pdf_path)
-    elif last_checked_password:
-        save_session(pdf_path, last_checked_password)
+    elif cursor:
+        save_session(pdf_path, session_mode or attack_name, cursor)
         
     return found_password
@@ -1,8 +1,10 @@
 # pdfraven/database.py
+import hashlib
 import json
 import os
 from pathlib import Path
 import pikepdf
+from .pdf_hash import display_password
 from .ui import log
 
 # These are module-level variables that will be set by main.py
@@ -11,43 +13,104 @@ SESSION_DIR = ".pdfraven_sessions"
 
 # --- Database Functions ---
 
+# Parsed database, reloaded only when the file's mtime (or DB_FILE) changes
+_DB_CACHE = None
+_DB_CACHE_FILE = None
+_DB_MTIME = 0
+
 def load_db():
-    if os.path.exists(DB_FILE):
-        try:
-            with open(DB_FILE, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            log(f"Warning: Could not parse '{DB_FILE}'. Starting fresh.", "warning")
-            return {}
-    return {}
+    global _DB_CACHE, _DB_CACHE_FILE, _DB_MTIME
+    try:
+        mtime = os.stat(DB_FILE).st_mtime_ns
+    except OSError:
+        return {}
+    if _DB_CACHE is not None and _DB_CACHE_FILE == DB_FILE and _DB_MTIME == mtime:
+        return _DB_CACHE
+    try:
+        with open(DB_FILE, 'r') as f:
+            db = json.load(f)
+    except json.JSONDecodeError:
+        log(f"Warning: Could not parse '{DB_FILE}'. Starting fresh.", "warning")
+        db = {}
+    _DB_CACHE, _DB_CACHE_FILE, _DB_MTIME = db, DB_FILE, mtime
+    return db
+
+def _write_db(db):
+    """Writes the database atomically and refreshes the cache."""
+    global _DB_CACHE, _DB_CACHE_FILE, _DB_MTIME
+    tmp_file = DB_FILE + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(db, f, indent=4)
+    # A crash mid-write leaves the old file intact instead of a truncated one
+    os.replace(tmp_file, DB_FILE)
+    _DB_CACHE, _DB_CACHE_FILE, _DB_MTIME = db, DB_FILE, os.stat(DB_FILE).st_mtime_ns
+
+def _file_key(pdf_path):
+    """
+    SHA-256 of the file's contents. Entries follow the document itself, so a
+    renamed or re-downloaded copy still hits while a modified file misses.
+    """
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb', buffering=1 << 20) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
 
 def save_to_db(pdf_path, password):
-    db = load_db()
-    abs_path = str(Path(pdf_path).resolve())
-    db[abs_path] = password
+    # A copy, so the cached database only changes once the write succeeds
+    db = dict(load_db())
+    key = _file_key(pdf_path)
+    text = display_password(password)
+    entry = {'password': text, 'path': str(Path(pdf_path).resolve())}
+    # Bytes that are not the UTF-8 form of the text (e.g. a Latin-1 password
+    # for an RC4 document) are kept exactly, so the entry still opens the file
+    if isinstance(password, bytes) and password != text.encode('utf-8'):
+        entry['password_hex'] = password.hex()
+    if db.get(key) == entry:
+        return
+    db[key] = entry
     try:
-        with open(DB_FILE, 'w') as f:
-            json.dump(db, f, indent=4)
+        _write_db(db)
     except Exception:
         log(f"Error saving password to database '{DB_FILE}'.", "danger")
 
 def check_db_for_password(pdf_path):
     db = load_db()
+    key = _file_key(pdf_path)
+    entry = db.get(key)
+    if isinstance(entry, dict) and 'password' in entry:
+        log(f"Database has the password for this file (last seen at [bold]{entry.get('path')}[/bold]). Skipping attack.", "success")
+        if 'password_hex' in entry:
+            return bytes.fromhex(entry['password_hex'])
+        return entry['password']
+    return _check_legacy_entry(db, pdf_path, key)
+
+def _check_legacy_entry(db, pdf_path, key):
+    """
+    Older databases map the resolved path to the password. Those entries are
+    tested once and then moved under the file's hash, or dropped if stale.
+    """
     abs_path = str(Path(pdf_path).resolve())
-    
-    if abs_path in db:
-        saved_pass = db[abs_path]
-        log(f"Found entry in database for this file. Testing password: [bold]{saved_pass}[/bold]", "info")
-        try:
-            with pikepdf.open(pdf_path, password=saved_pass):
-                log("Database password matched! Skipping attack.", "success")
-                return saved_pass
-        except pikepdf.PasswordError:
-            log("Database password incorrect (file changed?). Removing entry.", "warning")
-            del db[abs_path]
-            with open(DB_FILE, 'w') as f:
-                json.dump(db, f, indent=4)
-    return None
+    saved_pass = db.get(abs_path)
+    if not isinstance(saved_pass, str):
+        return None
+    log(f"Found a path-keyed database entry for this file. Testing password: [bold]{saved_pass}[/bold]", "info")
+    db = dict(db)  # The cached database only changes once the write succeeds
+    del db[abs_path]
+    try:
+        with pikepdf.open(pdf_path, password=saved_pass):
+            pass
+    except pikepdf.PasswordError:
+        log("Database password incorrect (file changed?). Removing entry.", "warning")
+        saved_pass = None
+    else:
+        log("Database password matched! Skipping attack.", "success")
+        db[key] = {'password': saved_pass, 'path': abs_path}
+    try:
+        _write_db(db)
+    except Exception:
+        log(f"Error updating database '{DB_FILE}'.", "danger")
+    return saved_pass
 
 # --- Session Management ---
 
@@ -58,24 +121,33 @@ def get_session_file(pdf_path):
     pdf_name = Path(pdf_path).stem
     return session_path / f"{pdf_name}.session"
 
-def save_session(pdf_path, last_password):
+def save_session(pdf_path, mode, cursor):
+    """
+    Records how many candidates of `mode` (the attack and its arguments) have
+    been tried. Generators seek straight to that index on resume.
+    """
     session_file = get_session_file(pdf_path)
-    session_data = {'last_password': last_password}
+    session_data = {'mode': mode, 'cursor': cursor}
     try:
         with open(session_file, 'w') as f:
             json.dump(session_data, f)
     except Exception:
         log(f"Warning: Could not save session to '{session_file}'.", "warning")
 
-def load_session(pdf_path):
+def load_session(pdf_path, mode):
+    """Returns the saved cursor for `mode`, or None if there is no matching session."""
     session_file = get_session_file(pdf_path)
     if os.path.exists(session_file):
         try:
             with open(session_file, 'r') as f:
                 session_data = json.load(f)
-                log(f"Resuming session, starting after: [bold]{session_data['last_password']}[/bold]", "info")
-                return session_data.get('last_password')
-        except (json.JSONDecodeError, KeyError):
+            if session_data['mode'] != mode:
+                log(f"Warning: Session '{session_file}' was saved for a different attack ({session_data['mode']}). Starting new session.", "warning")
+                return None
+            cursor = int(session_data['cursor'])
+            log(f"Resuming session, skipping the first [bold]{cursor:,}[/bold] candidates.", "info")
+            return cursor
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
             log(f"Warning: Invalid session file '{session_file}'. Starting new session.", "warning")
             return None
     return None
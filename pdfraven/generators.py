@@ -1,9 +1,16 @@
 # pdfraven/generators.py
+import functools
 import itertools
 import calendar
+import mmap
 import re
 import os
-from .config import CHARSET_MAP
+from math import prod
+from .config import CHARSET_MAP, CHARSET_MAP_BYTES
+from .pdf_hash import encode_password, decode_password
+
+_CUSTOM_QUERY_RE = re.compile(r'(.*)\{(\d+)-(\d+)\}(.*)')
+_RANGE_MASK_RE = re.compile(r'^\d+-\d+$')
 
 # --- Estimation Functions ---
 def estimate_total_from_mask(mask):
@@ -43,96 +50,154 @@ def estimate_total_custom_brute(charset, min_len, max_len):
         total += len(charset) ** length
     return total
 
+def count_lines(path, chunk_size=64 << 20):
+    """
+    Counts lines the way iterating over the file would, including a last line
+    without a trailing newline. The mmap is counted a slice at a time, so even
+    multi-GB wordlists are never copied into memory whole.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            count = sum(mm[i:i + chunk_size].count(b'\n') for i in range(0, size, chunk_size))
+            if mm[size - 1] != ord('\n'):
+                count += 1
+    return count
+
 # --- Password Generators ---
 
-def gen_wordlist(path, start_after=None):
-    found_start = not bool(start_after)
-    with open(path, 'r', encoding='latin-1', errors='ignore') as f:
-        for line := f.readlines():  # Using walrus operator for Python 3.8+
-            stripped_line = line.strip()
-            if not found_start and stripped_line == start_after:
-                found_start = True
+# Candidates per list yielded by generators called with batched=True
+GEN_BATCH_SIZE = 10_000
+
+# Largest first mask segment (in strings) that gen_from_mask builds in memory
+SEGMENT_CACHE_LIMIT = 1 << 20
+# Largest second hybrid mask (in candidates) that gen_hybrid keeps in memory
+HYBRID_CACHE_LIMIT = 1 << 20
+
+# (day, month) strings for every date of a leap year in calendar order; other
+# years use the table without 29 February
+_DAY_MONTHS_LEAP = [(f"{d:02d}", f"{m:02d}") for m in range(1, 13) for d in range(1, calendar.monthrange(2000, m)[1] + 1)]
+_DAY_MONTHS = [dm for dm in _DAY_MONTHS_LEAP if dm != ("29", "02")]
+
+# Date format -> (year first, month before day, four-digit year)
+_DATE_FORMATS = {
+    "DDMMYYYY": (False, False, True),
+    "YYYYMMDD": (True, True, True),
+    "MMDDYYYY": (False, True, True),
+    "DDMMYY": (False, False, False),
+    "YYMMDD": (True, True, False),
+    "MMDDYY": (False, True, False),
+}
+
+def _emit(runs, batched):
+    """
+    Flattens `runs`, an iterable of candidate iterables, into one iterator,
+    or with batched=True into lists of GEN_BATCH_SIZE candidates. Both are
+    assembled in C, so no Python frame is resumed for each candidate.
+    """
+    candidates = itertools.chain.from_iterable(runs)
+    if not batched:
+        return candidates
+    return iter(lambda: list(itertools.islice(candidates, GEN_BATCH_SIZE)), [])
+
+def gen_wordlist(path, offset=0, chunk_size=4 << 20, batched=False):
+    """
+    Yields wordlist entries as bytes, read in large binary chunks and split
+    with bytes.split. Only the line ending is removed, so leading or trailing
+    spaces that belong to a password are kept. The first `offset` lines are
+    skipped by counting newlines, without splitting them.
+    """
+    return _emit(_wordlist_runs(path, offset, chunk_size), batched)
+
+def _wordlist_runs(path, offset, chunk_size):
+    tail = b''
+    with open(path, 'rb') as f:
+        chunks = iter(lambda: f.read(chunk_size), b'')
+        skip = offset
+        while skip:
+            chunk = next(chunks, b'')
+            if not chunk:
+                return
+            newlines = chunk.count(b'\n')
+            if newlines < skip:
+                skip -= newlines
                 continue
-            if found_start:
-                yield stripped_line
+            # The skipped lines end inside this chunk; keep what follows them
+            pos = -1
+            for _ in range(skip):
+                pos = chunk.index(b'\n', pos + 1)
+            chunks = itertools.chain([chunk[pos + 1:]], chunks)
+            skip = 0
 
-def gen_range(start, end, start_after=None):
-    current = int(start_after) + 1 if start_after else start
-    for i in range(current, end + 1):
-        yield str(i)
+        for chunk in chunks:
+            data = tail + chunk
+            batch = data.split(b'\n')
+            tail = batch.pop()  # Partial line, completed by the next chunk
+            # Check the joined data: a CRLF split across chunks has its \r in tail
+            if b'\r' in data:
+                batch = [line.rstrip(b'\r') for line in batch]
+            yield batch
+    if tail:
+        yield [tail.rstrip(b'\r')]
 
-def gen_numeric(length, start_after=None):
-    limit = 10 ** length
-    start_num = int(start_after) + 1 if start_after else 0
-    for i in range(start_num, limit):
-        yield f"{i:0{length}d}"
+def gen_range(start, end, offset=0):
+    return map(str, range(start + offset, end + 1))
 
-def gen_date(start_year, end_year, date_format, separator, start_after=None):
+def gen_numeric(length, offset=0):
+    # Formatting runs in C through map; there is no Python frame per number
+    return map(f"{{:0{length}d}}".format, range(offset, 10 ** length))
+
+def gen_date(start_year, end_year, date_format, separator, offset=0, batched=False):
     """
     Generates dates in specified format (DDMMYYYY, YYYYMMDD, MMDDYYYY, DDMMYY, YYMMDD, MMDDYY)
     with an optional separator.
     """
-    resume_date_found = False
-    if not start_after:
-        resume_date_found = True # No start_after, so start immediately
-
-    for year in range(start_year, end_year + 1):
-        for month in range(1, 13):
-            _, num_days = calendar.monthrange(year, month)
-            for day in range(1, num_days + 1):
-                # Construct date components
-                d = f"{day:02d}"
-                m = f"{month:02d}"
-                y_full = str(year)
-                y_short = str(year)[2:]
-
-                # Build the date string based on format
-                formatted_date_parts = []
-                if date_format == "DDMMYYYY":
-                    formatted_date_parts = [d, m, y_full]
-                elif date_format == "YYYYMMDD":
-                    formatted_date_parts = [y_full, m, d]
-                elif date_format == "MMDDYYYY":
-                    formatted_date_parts = [m, d, y_full]
-                elif date_format == "DDMMYY":
-                    formatted_date_parts = [d, m, y_short]
-                elif date_format == "YYMMDD":
-                    formatted_date_parts = [y_short, m, d]
-                elif date_format == "MMDDYY":
-                    formatted_date_parts = [m, d, y_short]
-                else:
-                    # Should not happen due to argparse choices, but for safety
-                    raise ValueError(f"Invalid date format: {date_format}")
-
-                current_date_str = separator.join(formatted_date_parts)
-
-                if not resume_date_found:
-                    if current_date_str == start_after:
-                        resume_date_found = True
-                    continue
-                
-                yield current_date_str
-
-def gen_custom_query(query, add_zeros, start_after=None):
-    match = re.search(r'(.*)\{(\d+)-(\d+)\}(.*)', query)
-    if not match: return
+    if date_format not in _DATE_FORMATS:
+        # Should not happen due to argparse choices, but for safety
+        raise ValueError(f"Invalid date format: {date_format}")
+    year_first, month_first, full_year = _DATE_FORMATS[date_format]
+
+    # The day/month half of every date is the same each year, so it is joined
+    # (with the separator towards the year) once; only the year is attached per date
+    def day_month_strings(table):
+        parts = [separator.join((m, d) if month_first else (d, m)) for d, m in table]
+        return [separator + p for p in parts] if year_first else [p + separator for p in parts]
+    leap_dates, common_dates = day_month_strings(_DAY_MONTHS_LEAP), day_month_strings(_DAY_MONTHS)
+
+    def runs(offset):
+        for year in range(start_year, end_year + 1):
+            y = str(year) if full_year else str(year)[2:]
+            day_months = leap_dates if calendar.isleap(year) else common_dates
+            if offset >= len(day_months):
+                offset -= len(day_months)  # Whole year already tried
+                continue
+            day_months, offset = day_months[offset:], 0
+            if year_first:
+                yield map(y.__add__, day_months)
+            else:
+                yield map(str.__add__, day_months, itertools.repeat(y))
+    return _emit(runs(offset), batched)
+
+def gen_custom_query(query, add_zeros, offset=0, batched=False):
+    match = _CUSTOM_QUERY_RE.search(query)
+    if not match: return _emit((), batched)
     prefix, start, end, suffix = match.group(1), int(match.group(2)), int(match.group(3)), match.group(4)
     width = len(match.group(3)) if add_zeros else 0
     
-    start_num = 0
-    if start_after:
-        try:
-            start_num = int(re.search(r'\d+', start_after).group()) + 1
-        except (ValueError, AttributeError):
-            start_num = start
-            
-    for i in range(max(start, start_num), end + 1):
-        num = f"{i:0{width}d}" if add_zeros else str(i)
-        yield f"{prefix}{num}{suffix}"
+    # Candidates are built as bytes with one %-format each; a width of 0 means no padding
+    prefix, suffix = encode_password(prefix), encode_password(suffix)
+    template = prefix.replace(b"%", b"%%") + b"%0*d" + suffix.replace(b"%", b"%%")
+    numbers = zip(itertools.repeat(width), range(start + offset, end + 1))
+    return _emit([map(template.__mod__, numbers)], batched)
 
-def parse_mask(mask):
+@functools.lru_cache(maxsize=256)
+def parse_mask(mask, as_bytes=False):
     """
-    Parses a mask like "w{3}d{1,2}" into a list of character sets and lengths.
+    Parses a mask like "w{3}d{1,2}" into a tuple of (character set, lengths)
+    pairs. Cached, as the estimators and generators each parse the same mask.
+    With as_bytes=True the character sets come from CHARSET_MAP_BYTES.
     """
     if not mask:
         raise ValueError("Mask cannot be empty.")
@@ -164,111 +229,160 @@ def parse_mask(mask):
             elif len_match:
                 min_len = max_len = int(len_match)
         
-        parsed.append((CHARSET_MAP[char_type], range(min_len, max_len + 1)))
+        charset = CHARSET_MAP_BYTES[char_type] if as_bytes else CHARSET_MAP[char_type]
+        parsed.append((charset, range(min_len, max_len + 1)))
 
     if not parsed:
         raise ValueError(f"Could not parse mask: '{mask}'")
         
-    return parsed
+    return tuple(parsed)
 
-def gen_from_mask(mask, start_after=None):
+@functools.lru_cache(maxsize=32)
+def _segment_pool(charset, len_range):
     """
-    Generates passwords from a mask, e.g., "w{1,3}d"
+    Every string one mask segment can produce, in order, as a tuple. Cached,
+    since striped workers rebuild the same mask for every block.
     """
-    parsed_mask = parse_mask(mask)
+    join = "".join if isinstance(charset, str) else b"".join
+    return tuple(itertools.chain.from_iterable(
+        map(join, itertools.product(charset, repeat=length)) for length in len_range
+    ))
 
-    charsets = [item[0] for item in parsed_mask]
-    len_ranges = [item[1] for item in parsed_mask]
-
-    segment_product_iterators = []
-    for charset, len_range in zip(charsets, len_ranges):
-        len_iterators = []
-        for length in len_range:
-            len_iterators.append(itertools.product(charset, repeat=length))
-        segment_product_iterators.append(itertools.chain(*len_iterators))
+def gen_from_mask(mask, offset=0, as_bytes=False):
+    """
+    Generates passwords from a mask, e.g., "w{1,3}d". With as_bytes=True they
+    are bytes, which workers verify without encoding them first.
+    """
+    parsed_mask = parse_mask(mask, as_bytes)
+    join = b"".join if as_bytes else "".join
 
-    if not segment_product_iterators:
+    # itertools.product materializes its inputs anyway, so segments are built
+    # as tuples of already joined strings (one join per password, indexable
+    # for resuming). A first segment above SEGMENT_CACHE_LIMIT is walked
+    # lazily instead, so a large mask starts yielding without building it.
+    (first_charset, first_range), rest = parsed_mask[0], parsed_mask[1:]
+    first_size = sum(len(first_charset) ** length for length in first_range)
+    if first_size <= SEGMENT_CACHE_LIMIT:
+        segment_pools = [_segment_pool(charset, len_range) for charset, len_range in parsed_mask]
+        if offset >= prod(len(pool) for pool in segment_pools):
+            return
+        # Resuming seeks straight to combination `offset` instead of scanning up to it
+        combinations = _product_from(segment_pools, offset) if offset else itertools.product(*segment_pools)
+        yield from map(join, combinations)
         return
 
-    resuming = bool(start_after)
-    for combination_tuple in itertools.product(*segment_product_iterators):
-        parts = ["".join(part) for part in combination_tuple]
-        password = "".join(parts)
-
-        if resuming:
-            if password == start_after:
-                resuming = False
-            continue
-            
-        yield password
+    tail_pools = [_segment_pool(charset, len_range) for charset, len_range in rest]
+    skip_head, skip_tail = divmod(offset, prod(len(pool) for pool in tail_pools))
+    # gen_custom_brute enumerates one segment in the same order and seeks in O(1)
+    for head in gen_custom_brute(first_charset, first_range.start, first_range.stop - 1, offset=skip_head):
+        tails = _product_from(tail_pools, skip_tail) if skip_tail else itertools.product(*tail_pools)
+        skip_tail = 0
+        yield from map(head.__add__, map(join, tails))
 
-def get_generator_for_mask(mask_string, start_after=None):
+def get_generator_for_mask(mask_string, offset=0, sized=True):
     """
     Determines the correct generator to use for a given mask string.
+    With sized=False a wordlist is not counted and its total is None.
     """
     if os.path.isfile(mask_string):
         try:
-            count = sum(1 for _ in open(mask_string, 'rb'))
-            return (gen_wordlist(mask_string, start_after=start_after), count)
+            count = count_lines(mask_string) if sized else None
+            # Hybrid parts are joined as text, so decode the raw wordlist entries
+            return (map(decode_password, gen_wordlist(mask_string, offset=offset)), count)
         except Exception as e:
             raise ValueError(f"Could not read wordlist: {mask_string}") from e
             
-    elif re.match(r'^\d+-\d+$', mask_string):
+    elif _RANGE_MASK_RE.match(mask_string):
         start, end = map(int, mask_string.split('-'))
         if start >= end:
             raise ValueError(f"Invalid range '{mask_string}'. Min must be less than max.")
-        return (gen_range(start, end, start_after=start_after), (end - start + 1))
+        return (gen_range(start, end, offset=offset), (end - start + 1))
     else:
         try:
             total = estimate_total_from_mask(mask_string)
-            return (gen_from_mask(mask_string, start_after=start_after), total)
+            return (gen_from_mask(mask_string, offset=offset), total)
         except ValueError as e:
             raise ValueError(f"Invalid mask format '{mask_string}'. Use 'w', 'W', 'd', 's', 'b', 'h', 'a' with optional lengths like {{min,max}}.") from e
 
-def gen_hybrid(masks, start_after=None):
+def gen_hybrid(masks, offset=0, batched=False):
     """
     Generates passwords by combining multiple masks.
     """
     if len(masks) != 2:
         raise ValueError("Hybrid mode currently supports exactly two masks.")
 
-    last_parts = [None, None]
-    if start_after:
-        try:
-            gen1_preview, _ = get_generator_for_mask(masks[0])
-            for part1 in gen1_preview:
-                if start_after.startswith(part1):
-                    last_parts[0] = part1
-                    last_parts[1] = start_after[len(part1):]
-                    break
-            if last_parts[0] is None:
-                start_after = None
-        except Exception:
-            start_after = None
-
-    gen1, _ = get_generator_for_mask(masks[0], start_after=last_parts[0])
-    
-    for part1 in gen1:
-        current_start_after_part2 = last_parts[1] if part1 == last_parts[0] else None
-        gen2, _ = get_generator_for_mask(masks[1], start_after=current_start_after_part2)
-        for part2 in gen2:
-            yield f"{part1}{part2}"
-        last_parts[0] = None
-
-def gen_custom_brute(charset, min_l, max_l, start_after=None):
+    # Skip whole rounds of the second mask by advancing the first one
+    gen2, total2 = get_generator_for_mask(masks[1])
+    if offset and not total2:
+        return _emit([itertools.islice(gen_hybrid(masks), offset, None)], batched)
+    skip1, skip2 = divmod(offset, total2) if offset else (0, 0)
+    gen1, _ = get_generator_for_mask(masks[0], offset=skip1, sized=False)
+
+    # The second mask is replayed for every entry of the first. Small ones are
+    # generated once; larger ones are regenerated, but never re-counted.
+    if total2 is not None and total2 <= HYBRID_CACHE_LIMIT:
+        parts2 = tuple(gen2)
+        def replay(skip):
+            return itertools.islice(parts2, skip, None)
+    else:
+        def replay(skip):
+            return get_generator_for_mask(masks[1], offset=skip, sized=False)[0]
+
+    def runs(skip2):
+        for part1 in gen1:
+            yield map(part1.__add__, replay(skip2))
+            skip2 = 0
+    return _emit(runs(skip2), batched)
+
+def _product_from(pools, index):
     """
-    Generates passwords from a custom charset and length range.
+    itertools.product(*pools) starting at combination `index`, without
+    generating the ones before it. The index is split into mixed-radix
+    digits; the remainder of the sequence is then a chain of products, one
+    per position, each with the positions to its left held fixed.
     """
-    start_len = len(start_after) if start_after else min_l
-    
-    for length in range(start_len, max_l + 1):
-        g = itertools.product(charset, repeat=length)
+    digits = []
+    for pool in reversed(pools):
+        index, digit = divmod(index, len(pool))
+        digits.append(digit)
+    digits.reverse()
+
+    last = len(pools) - 1
+    segments = []
+    for k in range(last, -1, -1):
+        fixed = [(pools[i][digits[i]],) for i in range(k)]
+        first = digits[k] if k == last else digits[k] + 1
+        segments.append(itertools.product(*fixed, pools[k][first:], *pools[k + 1:]))
+    return itertools.chain.from_iterable(segments)
+
+def gen_custom_brute(charset, min_l, max_l, offset=0):
+    """
+    Generates passwords from a custom charset and length range. A charset
+    given as a tuple of single bytes (see CHARSET_MAP_BYTES) yields bytes.
+    """
+    join = "".join if isinstance(charset, str) else b"".join
+    for length in range(min_l, max_l + 1):
+        count = len(charset) ** length
+        if offset >= count:
+            offset -= count  # Every password of this length was already tried
+            continue
+        g = _product_from([charset] * length, offset) if offset else itertools.product(charset, repeat=length)
+        offset = 0
+        yield from map(join, g)
+
+# --- Keyspace Slices ---
+# Each yields candidates lo..hi-1 of its attack as batches, seeking to lo
+# rather than scanning, so a worker can generate its own share of the
+# keyspace (see cracker.attack_stride).
+
+def gen_range_slice(start, end, lo, hi):
+    yield list(itertools.islice(gen_range(start, end, offset=lo), hi - lo))
+
+def gen_numeric_slice(length, lo, hi):
+    yield list(itertools.islice(gen_numeric(length, offset=lo), hi - lo))
 
-        if start_after and len(start_after) == length:
-            start_tuple = tuple(start_after)
-            g = itertools.dropwhile(lambda x: x != start_tuple, g)
-            next(g, None) 
-            start_after = None
+def gen_from_mask_slice(mask, lo, hi):
+    yield list(itertools.islice(gen_from_mask(mask, offset=lo, as_bytes=True), hi - lo))
 
-        for p in g:
-            yield "".join(p)
+def gen_custom_brute_slice(charset, min_l, max_l, lo, hi):
+    yield list(itertools.islice(gen_custom_brute(charset, min_l, max_l, offset=lo), hi - lo))
@@ -0,0 +1,106 @@
+# pdfraven/generators_np.py
+# Batched generators that emit candidates as uint8 arrays instead of one str
+# per password. NumPy is optional; callers check HAS_NUMPY first.
+import itertools
+
+from .generators import gen_custom_brute
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+HAS_NUMPY = np is not None
+HAS_NUMBA = HAS_NUMPY and njit is not None
+
+# Keyspace indices are int64 in the kernel and in np.arange
+_INT64_MAX = 2 ** 63 - 1
+
+if HAS_NUMBA:
+    # Serial on purpose: the cracker already runs one generator per worker
+    # process or thread. A parallel kernel first called from several pool
+    # threads at once deadlocks Numba's threading layer and hangs at exit.
+    # Compiled on first use; cache=True keeps that to a disk load afterwards.
+    @njit(cache=True)
+    def fill_brute_batch(out, start, charset):
+        """
+        Fills row i of `out` with the candidate at keyspace index start + i.
+        Splits `start` into digits once and then counts like an odometer,
+        instead of dividing for every row.
+        """
+        base = charset.shape[0]
+        rows, length = out.shape
+        digits = np.empty(length, np.int64)
+        idx = start
+        for pos in range(length - 1, -1, -1):
+            digits[pos] = idx % base
+            idx //= base
+        for row in range(rows):
+            for pos in range(length):
+                out[row, pos] = charset[digits[pos]]
+            pos = length - 1
+            while pos >= 0:
+                digits[pos] += 1
+                if digits[pos] < base:
+                    break
+                digits[pos] = 0
+                pos -= 1
+
+def supports_charset(charset):
+    """Batched emitters need exactly one byte per character."""
+    return HAS_NUMPY and charset.isascii()
+
+def gen_brute_np(min_l, max_l, charset, batch=100_000, offset=0):
+    """
+    Yields brute-force candidates as (n, length) uint8 arrays, one password per
+    row, in the same order as itertools.product(charset, repeat=length),
+    starting `offset` candidates in. Batches past index 2**63 - 1 of a length
+    are filled from gen_custom_brute instead.
+    """
+    cs = np.frombuffer(charset.encode('ascii'), dtype=np.uint8)
+    base = len(cs)
+    skip = offset
+    for length in range(min_l, max_l + 1):
+        total = base ** length
+        if skip >= total:
+            skip -= total
+            continue
+        first, skip = skip, 0
+        for start in range(first, total, batch):
+            out = np.empty((min(batch, total - start), length), dtype=np.uint8)
+            if start + len(out) > _INT64_MAX:
+                # The int64 index math would wrap silently here
+                chunk = itertools.islice(gen_custom_brute(charset, length, length, offset=start), len(out))
+                out[:] = np.frombuffer(''.join(chunk).encode('ascii'), dtype=np.uint8).reshape(out.shape)
+            elif HAS_NUMBA:
+                fill_brute_batch(out, start, cs)
+            else:
+                # Decompose each index into base-N digits, least significant last
+                idx = np.arange(start, start + len(out), dtype=np.int64)
+                for pos in range(length - 1, -1, -1):
+                    idx, digit = np.divmod(idx, base)
+                    out[:, pos] = cs[digit]
+            yield out
+
+def gen_numeric_np(length, batch=100_000, offset=0):
+    """Batched gen_numeric: every zero-padded number of `length` digits, in order."""
+    return gen_brute_np(length, length, "0123456789", batch=batch, offset=offset)
+
+def gen_brute_np_slice(min_l, max_l, charset, lo, hi):
+    """Candidates lo..hi-1 of gen_brute_np, as batches (see generators.gen_numeric_slice)."""
+    count = hi - lo
+    if count <= 0:
+        return  # batch=0 would be an invalid range() step
+    for batch in gen_brute_np(min_l, max_l, charset, batch=count, offset=lo):
+        yield batch[:count]
+        count -= len(batch)
+        if count <= 0:
+            return
+
+def gen_numeric_np_slice(length, lo, hi):
+    return gen_brute_np_slice(length, length, "0123456789", lo, hi)
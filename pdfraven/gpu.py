@@ -0,0 +1,347 @@
+# pdfraven/gpu.py
+"""
+Optional CUDA verifier for revision 5/6 (AES-256) PDFs, used by --gpu.
+
+Each thread streams one candidate through the Algorithm 2.B hash chain
+(SHA-256/384/512 + AES-128-CBC), so no per-thread 15 KB buffer is needed.
+Requires CuPy and a CUDA device; everything else falls back to the CPU.
+"""
+try:
+    import cupy as cp
+    import numpy as np
+except ImportError:
+    cp = None
+    np = None
+
+MAX_PASSWORD_LENGTH = 127
+THREADS_PER_BLOCK = 256
+
+_KERNEL_SOURCE = r'''
+typedef unsigned char u8;
+typedef unsigned int u32;
+typedef unsigned long long u64;
+
+__constant__ u32 K256[64] = {
+    0x428a2f98,0x71374491,0xb5c0fbcf,0xe9b5dba5,0x3956c25b,0x59f111f1,0x923f82a4,0xab1c5ed5,
+    0xd807aa98,0x12835b01,0x243185be,0x550c7dc3,0x72be5d74,0x80deb1fe,0x9bdc06a7,0xc19bf174,
+    0xe49b69c1,0xefbe4786,0x0fc19dc6,0x240ca1cc,0x2de92c6f,0x4a7484aa,0x5cb0a9dc,0x76f988da,
+    0x983e5152,0xa831c66d,0xb00327c8,0xbf597fc7,0xc6e00bf3,0xd5a79147,0x06ca6351,0x14292967,
+    0x27b70a85,0x2e1b2138,0x4d2c6dfc,0x53380d13,0x650a7354,0x766a0abb,0x81c2c92e,0x92722c85,
+    0xa2bfe8a1,0xa81a664b,0xc24b8b70,0xc76c51a3,0xd192e819,0xd6990624,0xf40e3585,0x106aa070,
+    0x19a4c116,0x1e376c08,0x2748774c,0x34b0bcb5,0x391c0cb3,0x4ed8aa4a,0x5b9cca4f,0x682e6ff3,
+    0x748f82ee,0x78a5636f,0x84c87814,0x8cc70208,0x90befffa,0xa4506ceb,0xbef9a3f7,0xc67178f2};
+
+__constant__ u64 K512[80] = {
+    0x428a2f98d728ae22ULL,0x7137449123ef65cdULL,0xb5c0fbcfec4d3b2fULL,0xe9b5dba58189dbbcULL,
+    0x3956c25bf348b538ULL,0x59f111f1b605d019ULL,0x923f82a4af194f9bULL,0xab1c5ed5da6d8118ULL,
+    0xd807aa98a3030242ULL,0x12835b0145706fbeULL,0x243185be4ee4b28cULL,0x550c7dc3d5ffb4e2ULL,
+    0x72be5d74f27b896fULL,0x80deb1fe3b1696b1ULL,0x9bdc06a725c71235ULL,0xc19bf174cf692694ULL,
+    0xe49b69c19ef14ad2ULL,0xefbe4786384f25e3ULL,0x0fc19dc68b8cd5b5ULL,0x240ca1cc77ac9c65ULL,
+    0x2de92c6f592b0275ULL,0x4a7484aa6ea6e483ULL,0x5cb0a9dcbd41fbd4ULL,0x76f988da831153b5ULL,
+    0x983e5152ee66dfabULL,0xa831c66d2db43210ULL,0xb00327c898fb213fULL,0xbf597fc7beef0ee4ULL,
+    0xc6e00bf33da88fc2ULL,0xd5a79147930aa725ULL,0x06ca6351e003826fULL,0x142929670a0e6e70ULL,
+    0x27b70a8546d22ffcULL,0x2e1b21385c26c926ULL,0x4d2c6dfc5ac42aedULL,0x53380d139d95b3dfULL,
+    0x650a73548baf63deULL,0x766a0abb3c77b2a8ULL,0x81c2c92e47edaee6ULL,0x92722c851482353bULL,
+    0xa2bfe8a14cf10364ULL,0xa81a664bbc423001ULL,0xc24b8b70d0f89791ULL,0xc76c51a30654be30ULL,
+    0xd192e819d6ef5218ULL,0xd69906245565a910ULL,0xf40e35855771202aULL,0x106aa07032bbd1b8ULL,
+    0x19a4c116b8d2d0c8ULL,0x1e376c085141ab53ULL,0x2748774cdf8eeb99ULL,0x34b0bcb5e19b48a8ULL,
+    0x391c0cb3c5c95a63ULL,0x4ed8aa4ae3418acbULL,0x5b9cca4f7763e373ULL,0x682e6ff3d6b2b8a3ULL,
+    0x748f82ee5defb2fcULL,0x78a5636f43172f60ULL,0x84c87814a1f0ab72ULL,0x8cc702081a6439ecULL,
+    0x90befffa23631e28ULL,0xa4506cebde82bde9ULL,0xbef9a3f7b2c67915ULL,0xc67178f2e372532bULL,
+    0xca273eceea26619cULL,0xd186b8c721c0c207ULL,0xeada7dd6cde0eb1eULL,0xf57d4f7fee6ed178ULL,
+    0x06f067aa72176fbaULL,0x0a637dc5a2c898a6ULL,0x113f9804bef90daeULL,0x1b710b35131c471bULL,
+    0x28db77f523047d84ULL,0x32caab7b40c72493ULL,0x3c9ebe0a15c9bebcULL,0x431d67c49c100d4cULL,
+    0x4cc5d4becb3e42b6ULL,0x597f299cfc657e2aULL,0x5fcb6fab3ad6faecULL,0x6c44198c4a475817ULL};
+
+__constant__ u8 SBOX[256] = {
+    0x63,0x7c,0x77,0x7b,0xf2,0x6b,0x6f,0xc5,0x30,0x01,0x67,0x2b,0xfe,0xd7,0xab,0x76,
+    0xca,0x82,0xc9,0x7d,0xfa,0x59,0x47,0xf0,0xad,0xd4,0xa2,0xaf,0x9c,0xa4,0x72,0xc0,
+    0xb7,0xfd,0x93,0x26,0x36,0x3f,0xf7,0xcc,0x34,0xa5,0xe5,0xf1,0x71,0xd8,0x31,0x15,
+    0x04,0xc7,0x23,0xc3,0x18,0x96,0x05,0x9a,0x07,0x12,0x80,0xe2,0xeb,0x27,0xb2,0x75,
+    0x09,0x83,0x2c,0x1a,0x1b,0x6e,0x5a,0xa0,0x52,0x3b,0xd6,0xb3,0x29,0xe3,0x2f,0x84,
+    0x53,0xd1,0x00,0xed,0x20,0xfc,0xb1,0x5b,0x6a,0xcb,0xbe,0x39,0x4a,0x4c,0x58,0xcf,
+    0xd0,0xef,0xaa,0xfb,0x43,0x4d,0x33,0x85,0x45,0xf9,0x02,0x7f,0x50,0x3c,0x9f,0xa8,
+    0x51,0xa3,0x40,0x8f,0x92,0x9d,0x38,0xf5,0xbc,0xb6,0xda,0x21,0x10,0xff,0xf3,0xd2,
+    0xcd,0x0c,0x13,0xec,0x5f,0x97,0x44,0x17,0xc4,0xa7,0x7e,0x3d,0x64,0x5d,0x19,0x73,
+    0x60,0x81,0x4f,0xdc,0x22,0x2a,0x90,0x88,0x46,0xee,0xb8,0x14,0xde,0x5e,0x0b,0xdb,
+    0xe0,0x32,0x3a,0x0a,0x49,0x06,0x24,0x5c,0xc2,0xd3,0xac,0x62,0x91,0x95,0xe4,0x79,
+    0xe7,0xc8,0x37,0x6d,0x8d,0xd5,0x4e,0xa9,0x6c,0x56,0xf4,0xea,0x65,0x7a,0xae,0x08,
+    0xba,0x78,0x25,0x2e,0x1c,0xa6,0xb4,0xc6,0xe8,0xdd,0x74,0x1f,0x4b,0xbd,0x8b,0x8a,
+    0x70,0x3e,0xb5,0x66,0x48,0x03,0xf6,0x0e,0x61,0x35,0x57,0xb9,0x86,0xc1,0x1d,0x9e,
+    0xe1,0xf8,0x98,0x11,0x69,0xd9,0x8e,0x94,0x9b,0x1e,0x87,0xe9,0xce,0x55,0x28,0xdf,
+    0x8c,0xa1,0x89,0x0d,0xbf,0xe6,0x42,0x68,0x41,0x99,0x2d,0x0f,0xb0,0x54,0xbb,0x16};
+
+#define ROR32(x, n) (((x) >> (n)) | ((x) << (32 - (n))))
+#define ROR64(x, n) (((x) >> (n)) | ((x) << (64 - (n))))
+
+/* --- SHA-256 --- */
+
+struct Sha256 { u32 h[8]; u8 buf[64]; u32 len; u64 total; };
+
+__device__ void sha256_block(Sha256 *c) {
+    u32 w[64];
+    for (int i = 0; i < 16; i++)
+        w[i] = ((u32)c->buf[4*i] << 24) | ((u32)c->buf[4*i+1] << 16) | ((u32)c->buf[4*i+2] << 8) | c->buf[4*i+3];
+    for (int i = 16; i < 64; i++) {
+        u32 s0 = ROR32(w[i-15], 7) ^ ROR32(w[i-15], 18) ^ (w[i-15] >> 3);
+        u32 s1 = ROR32(w[i-2], 17) ^ ROR32(w[i-2], 19) ^ (w[i-2] >> 10);
+        w[i] = w[i-16] + s0 + w[i-7] + s1;
+    }
+    u32 a = c->h[0], b = c->h[1], cc = c->h[2], d = c->h[3];
+    u32 e = c->h[4], f = c->h[5], g = c->h[6], h = c->h[7];
+    for (int i = 0; i < 64; i++) {
+        u32 t1 = h + (ROR32(e, 6) ^ ROR32(e, 11) ^ ROR32(e, 25)) + ((e & f) ^ (~e & g)) + K256[i] + w[i];
+        u32 t2 = (ROR32(a, 2) ^ ROR32(a, 13) ^ ROR32(a, 22)) + ((a & b) ^ (a & cc) ^ (b & cc));
+        h = g; g = f; f = e; e = d + t1; d = cc; cc = b; b = a; a = t1 + t2;
+    }
+    c->h[0] += a; c->h[1] += b; c->h[2] += cc; c->h[3] += d;
+    c->h[4] += e; c->h[5] += f; c->h[6] += g; c->h[7] += h;
+}
+
+__device__ void sha256_init(Sha256 *c) {
+    const u32 iv[8] = {0x6a09e667,0xbb67ae85,0x3c6ef372,0xa54ff53a,0x510e527f,0x9b05688c,0x1f83d9ab,0x5be0cd19};
+    for (int i = 0; i < 8; i++) c->h[i] = iv[i];
+    c->len = 0; c->total = 0;
+}
+
+__device__ void sha256_update(Sha256 *c, const u8 *data, int n) {
+    for (int i = 0; i < n; i++) {
+        c->buf[c->len++] = data[i];
+        if (c->len == 64) { sha256_block(c); c->len = 0; }
+    }
+    c->total += n;
+}
+
+__device__ void sha256_final(Sha256 *c, u8 *out) {
+    u64 bits = c->total * 8;
+    u8 pad = 0x80;
+    sha256_update(c, &pad, 1);
+    pad = 0;
+    while (c->len != 56) sha256_update(c, &pad, 1);
+    for (int i = 7; i >= 0; i--) { u8 b = (u8)(bits >> (8 * i)); sha256_update(c, &b, 1); }
+    for (int i = 0; i < 8; i++) {
+        out[4*i] = c->h[i] >> 24; out[4*i+1] = c->h[i] >> 16; out[4*i+2] = c->h[i] >> 8; out[4*i+3] = c->h[i];
+    }
+}
+
+/* --- SHA-384 / SHA-512 --- */
+
+struct Sha512 { u64 h[8]; u8 buf[128]; u32 len; u64 total; };
+
+__device__ void sha512_block(Sha512 *c) {
+    u64 w[80];
+    for (int i = 0; i < 16; i++) {
+        u64 v = 0;
+        for (int j = 0; j < 8; j++) v = (v << 8) | c->buf[8*i+j];
+        w[i] = v;
+    }
+    for (int i = 16; i < 80; i++) {
+        u64 s0 = ROR64(w[i-15], 1) ^ ROR64(w[i-15], 8) ^ (w[i-15] >> 7);
+        u64 s1 = ROR64(w[i-2], 19) ^ ROR64(w[i-2], 61) ^ (w[i-2] >> 6);
+        w[i] = w[i-16] + s0 + w[i-7] + s1;
+    }
+    u64 a = c->h[0], b = c->h[1], cc = c->h[2], d = c->h[3];
+    u64 e = c->h[4], f = c->h[5], g = c->h[6], h = c->h[7];
+    for (int i = 0; i < 80; i++) {
+        u64 t1 = h + (ROR64(e, 14) ^ ROR64(e, 18) ^ ROR64(e, 41)) + ((e & f) ^ (~e & g)) + K512[i] + w[i];
+        u64 t2 = (ROR64(a, 28) ^ ROR64(a, 34) ^ ROR64(a, 39)) + ((a & b) ^ (a & cc) ^ (b & cc));
+        h = g; g = f; f = e; e = d + t1; d = cc; cc = b; b = a; a = t1 + t2;
+    }
+    c->h[0] += a; c->h[1] += b; c->h[2] += cc; c->h[3] += d;
+    c->h[4] += e; c->h[5] += f; c->h[6] += g; c->h[7] += h;
+}
+
+__device__ void sha512_init(Sha512 *c, int is384) {
+    const u64 iv512[8] = {
+        0x6a09e667f3bcc908ULL,0xbb67ae8584caa73bULL,0x3c6ef372fe94f82bULL,0xa54ff53a5f1d36f1ULL,
+        0x510e527fade682d1ULL,0x9b05688c2b3e6c1fULL,0x1f83d9abfb41bd6bULL,0x5be0cd19137e2179ULL};
+    const u64 iv384[8] = {
+        0xcbbb9d5dc1059ed8ULL,0x629a292a367cd507ULL,0x9159015a3070dd17ULL,0x152fecd8f70e5939ULL,
+        0x67332667ffc00b31ULL,0x8eb44a8768581511ULL,0xdb0c2e0d64f98fa7ULL,0x47b5481dbefa4fa4ULL};
+    for (int i = 0; i < 8; i++) c->h[i] = is384 ? iv384[i] : iv512[i];
+    c->len = 0; c->total = 0;
+}
+
+__device__ void sha512_update(Sha512 *c, const u8 *data, int n) {
+    for (int i = 0; i < n; i++) {
+        c->buf[c->len++] = data[i];
+        if (c->len == 128) { sha512_block(c); c->len = 0; }
+    }
+    c->total += n;
+}
+
+__device__ void sha512_final(Sha512 *c, u8 *out, int out_len) {
+    u64 bits = c->total * 8;
+    u8 pad = 0x80;
+    sha512_update(c, &pad, 1);
+    pad = 0;
+    while (c->len != 120) sha512_update(c, &pad, 1);
+    for (int i = 7; i >= 0; i--) { u8 b = (u8)(bits >> (8 * i)); sha512_update(c, &b, 1); }
+    for (int i = 0; i < out_len; i++) out[i] = (u8)(c->h[i / 8] >> (56 - 8 * (i % 8)));
+}
+
+/* --- AES-128 (encryption only) --- */
+
+__device__ u8 xtime(u8 x) { return (u8)((x << 1) ^ ((x & 0x80) ? 0x1b : 0)); }
+
+__device__ void aes128_expand(const u8 *key, u8 *rk) {
+    u8 rcon = 1;
+    for (int i = 0; i < 16; i++) rk[i] = key[i];
+    for (int i = 16; i < 176; i += 4) {
+        u8 t0 = rk[i-4], t1 = rk[i-3], t2 = rk[i-2], t3 = rk[i-1];
+        if (i % 16 == 0) {
+            u8 tmp = t0;
+            t0 = SBOX[t1] ^ rcon; t1 = SBOX[t2]; t2 = SBOX[t3]; t3 = SBOX[tmp];
+            rcon = xtime(rcon);
+        }
+        rk[i] = rk[i-16] ^ t0; rk[i+1] = rk[i-15] ^ t1; rk[i+2] = rk[i-14] ^ t2; rk[i+3] = rk[i-13] ^ t3;
+    }
+}
+
+__device__ void aes128_encrypt(const u8 *rk, u8 *s) {
+    for (int i = 0; i < 16; i++) s[i] ^= rk[i];
+    for (int round = 1; round <= 10; round++) {
+        u8 t[16];
+        /* SubBytes + ShiftRows (column-major state) */
+        for (int col = 0; col < 4; col++)
+            for (int row = 0; row < 4; row++)
+                t[4*col + row] = SBOX[s[4*((col + row) % 4) + row]];
+        if (round < 10) {
+            for (int col = 0; col < 4; col++) {
+                u8 a0 = t[4*col], a1 = t[4*col+1], a2 = t[4*col+2], a3 = t[4*col+3];
+                u8 all = a0 ^ a1 ^ a2 ^ a3;
+                t[4*col]   = a0 ^ all ^ xtime(a0 ^ a1);
+                t[4*col+1] = a1 ^ all ^ xtime(a1 ^ a2);
+                t[4*col+2] = a2 ^ all ^ xtime(a2 ^ a3);
+                t[4*col+3] = a3 ^ all ^ xtime(a3 ^ a0);
+            }
+        }
+        for (int i = 0; i < 16; i++) s[i] = t[i] ^ rk[16*round + i];
+    }
+}
+
+/* --- Algorithm 2.B --- */
+
+__device__ void pdf_hash(const u8 *pwd, int plen, const u8 *salt, const u8 *ukey, int ulen,
+                         int revision, u8 *out) {
+    u8 k[64];
+    int klen = 32;
+    Sha256 s256;
+    sha256_init(&s256);
+    sha256_update(&s256, pwd, plen);
+    sha256_update(&s256, salt, 8);
+    sha256_update(&s256, ukey, ulen);
+    sha256_final(&s256, k);
+    if (revision == 5) {
+        for (int i = 0; i < 32; i++) out[i] = k[i];
+        return;
+    }
+
+    u8 seq[127 + 64 + 48];
+    u8 rk[176];
+    Sha512 s512;
+    for (int round = 1; ; round++) {
+        /* K1 = (password + K + user_key) repeated 64 times, streamed through AES-CBC */
+        int seqlen = 0;
+        for (int i = 0; i < plen; i++) seq[seqlen++] = pwd[i];
+        for (int i = 0; i < klen; i++) seq[seqlen++] = k[i];
+        for (int i = 0; i < ulen; i++) seq[seqlen++] = ukey[i];
+        aes128_expand(k, rk);
+        u8 block[16];
+        for (int i = 0; i < 16; i++) block[i] = k[16 + i];  /* IV */
+
+        int total = 64 * seqlen, pos = 0, selector = 0;
+        for (int off = 0; off < total; off += 16) {
+            for (int i = 0; i < 16; i++) {
+                block[i] ^= seq[pos];
+                if (++pos == seqlen) pos = 0;
+            }
+            aes128_encrypt(rk, block);
+            if (off == 0) {
+                int sum = 0;
+                for (int i = 0; i < 16; i++) sum += block[i];
+                selector = sum % 3;
+                if (selector == 0) sha256_init(&s256);
+                else sha512_init(&s512, selector == 1);
+            }
+            if (selector == 0) sha256_update(&s256, block, 16);
+            else sha512_update(&s512, block, 16);
+        }
+        if (selector == 0) { sha256_final(&s256, k); klen = 32; }
+        else if (selector == 1) { sha512_final(&s512, k, 48); klen = 48; }
+        else { sha512_final(&s512, k, 64); klen = 64; }
+
+        if (round >= 64 && block[15] <= round - 32) break;
+    }
+    for (int i = 0; i < 32; i++) out[i] = k[i];
+}
+
+__device__ int bytes_equal(const u8 *a, const u8 *b, int n) {
+    for (int i = 0; i < n; i++) if (a[i] != b[i]) return 0;
+    return 1;
+}
+
+/* params: u_hash[32] u_salt[8] o_hash[32] o_salt[8] u_key[48] */
+extern "C" __global__ void pdf_verify(const u8 *passwords, const u8 *lengths, int count,
+                                      const u8 *params, int revision, int *match) {
+    int idx = blockIdx.x * blockDim.x + threadIdx.x;
+    if (idx >= count) return;
+    const u8 *pwd = passwords + 128 * idx;
+    int plen = lengths[idx];
+    u8 digest[32];
+    pdf_hash(pwd, plen, params + 32, params, 0, revision, digest);
+    if (bytes_equal(digest, params, 32)) { atomicMin(match, idx); return; }
+    pdf_hash(pwd, plen, params + 72, params + 80, 48, revision, digest);
+    if (bytes_equal(digest, params + 40, 32)) atomicMin(match, idx);
+}
+'''
+
+_kernel = None
+
+def is_available():
+    """Returns True if CuPy is installed and a CUDA device is present."""
+    if cp is None:
+        return False
+    try:
+        return cp.cuda.runtime.getDeviceCount() > 0
+    except cp.cuda.runtime.CUDARuntimeError:
+        return False
+
+def supports(info):
+    """The kernel implements the SHA-2 based revisions only."""
+    return info is not None and info.R in (5, 6)
+
+def _get_kernel():
+    global _kernel
+    if _kernel is None:
+        _kernel = cp.RawKernel(_KERNEL_SOURCE, 'pdf_verify')
+    return _kernel
+
+def verify_batch(info, passwords):
+    """
+    Checks a list of bytes in one kernel launch; returns the index of the
+    first matching password, or -1 if none matches.
+    """
+    count = len(passwords)
+    if not count:
+        return -1
+    passwords = [p[:MAX_PASSWORD_LENGTH] for p in passwords]
+    packed = np.frombuffer(b''.join(p.ljust(128, b'\0') for p in passwords), dtype=np.uint8)
+    lengths = np.fromiter((len(p) for p in passwords), dtype=np.uint8, count=count)
+    params = np.frombuffer(info.U[:32] + info.U[32:40] + info.O[:32] + info.O[32:40] + info.U[:48], dtype=np.uint8)
+
+    match = cp.full(1, count, dtype=cp.int32)
+    blocks = (count + THREADS_PER_BLOCK - 1) // THREADS_PER_BLOCK
+    _get_kernel()(
+        (blocks,), (THREADS_PER_BLOCK,),
+        (cp.asarray(packed), cp.asarray(lengths), np.int32(count), cp.asarray(params), np.int32(info.R), match),
+    )
+    index = int(match.get()[0])
+    return index if index < count else -1
+
+def make_verifier(info):
+    """GPU counterpart of pdf_hash.make_verifier, for R5/R6 documents."""
+    def verify(passwords):
+        index = verify_batch(info, passwords)
+        return passwords[index] if index >= 0 else None
+    return verify
@@ -1,6 +1,7 @@
 import argparse
 import multiprocessing
 import os
+import re
 import sys
 import pikepdf
 from pathlib import Path
@@ -9,6 +10,14 @@ from . import ui
 from . import cracker
 from . import database
 from . import generators
+from . import generators_np
+from . import pdf_hash
+
+_QUERY_RANGE_RE = re.compile(r'\{(\d+)-(\d+)\}')
+
+# Attack arguments that define the candidate sequence, recorded with each session
+SESSION_KEYS = ("path", "min", "max", "length", "start_year", "end_year", "format", "separator", "query",
+                "add_preceding_zeros", "mask", "masks", "charset", "min_length", "max_length")
 
 def setup_arg_parser():
     parser = argparse.ArgumentParser(
@@ -25,8 +34,11 @@ def setup_arg_parser():
 
     # Performance
     perf_args = parser.add_argument_group("Performance Arguments")
-    perf_args.add_argument("-b", "--batch-size", type=int, default=1000, help="Number of passwords per worker batch.")
+    perf_args.add_argument("-b", "--batch-size", type=int, default=None, help="Number of passwords per worker batch (default: auto-tuned to ~100 ms per batch).")
     perf_args.add_argument("--timeout", type=int, default=None, help="Maximum time in seconds to run the attack.")
+    perf_args.add_argument("--length-filter", type=int, nargs=2, metavar=("MIN", "MAX"), default=None,
+                           help="Skip candidates whose encoded length in bytes is outside MIN..MAX before hashing.")
+    perf_args.add_argument("--gpu", action="store_true", help="Verify passwords on a CUDA GPU (requires CuPy; AES-256 PDFs only).")
 
     # File Paths
     path_args = parser.add_argument_group("File Path Arguments")
@@ -82,6 +94,19 @@ def setup_arg_parser():
 
     return parser
 
+def save_decrypted(pdf_path, password, output_dir):
+    """Writes a decrypted copy of the PDF with a single open; returns its path, or None on failure."""
+    output_path = Path(output_dir)
+    output_path.mkdir(exist_ok=True)
+    decrypted_path = output_path / f"decrypted_{Path(pdf_path).name}"
+    try:
+        with pikepdf.open(pdf_path, password=password) as pdf:
+            pdf.save(decrypted_path)
+    except Exception as e:
+        ui.log(f"Could not save decrypted file: {e}", "danger")
+        return None
+    return decrypted_path
+
 def main():
     parser = setup_arg_parser()
     args = parser.parse_args()
@@ -90,6 +115,11 @@ def main():
         ui.print_manual()
         sys.exit(0)
 
+    if args.length_filter:
+        min_len, max_len = args.length_filter
+        if min_len < 0 or min_len > max_len:
+            parser.error("--length-filter needs 0 <= MIN <= MAX.")
+
     # --- Setup and Config ---
     # Pass configurable paths to the database module
     database.DB_FILE = args.db_file
@@ -117,65 +147,77 @@ def main():
     # --- DB Check ---
     db_pass = database.check_db_for_password(args.file)
     if db_pass:
-        output_path = Path(args.output_dir)
-        output_path.mkdir(exist_ok=True)
-        decrypted_path = output_path / f"decrypted_{Path(args.file).name}"
-        try:
-            with pikepdf.open(args.file, password=db_pass) as pdf:
-                pdf.save(decrypted_path)
-        except Exception:
-            decrypted_path = None
-        ui.print_result(db_pass, args.file, decrypted_path)
+        # The stored password is trusted, so the file is only opened to write the copy
+        decrypted_path = None if args.no_decrypt else save_decrypted(args.file, db_pass, args.output_dir)
+        ui.print_result(pdf_hash.display_password(db_pass), args.file, decrypted_path)
         sys.exit(0)
 
     # --- Session Handling ---
-    resume_password = None
+    # A session resumes only the same attack over the same candidate sequence
+    session_mode = " ".join([args.command] + [f"{key}={getattr(args, key)!r}" for key in SESSION_KEYS if hasattr(args, key)])
+    resume_offset = 0
     if args.resume:
-        resume_password = database.load_session(args.file)
-        if not resume_password:
+        resume_offset = database.load_session(args.file, session_mode) or 0
+        if not resume_offset:
             ui.log("No session found to resume, starting a new attack.", "warning")
 
     # --- Generator and Estimator Setup ---
+    # Modes with an exact, seekable keyspace also set `stride`, a slice
+    # function and its arguments: workers then generate their own share of
+    # the keyspace, and the generator only feeds the batch size probe
     generator = None
     est_total = None
+    batched = False
+    stride = None
 
     try:
         if args.command == "wordlist":
             if not os.path.isfile(args.path):
                 raise FileNotFoundError(f"Wordlist file not found: {args.path}")
             ui.log("Counting lines in wordlist for progress bar...", "info")
-            est_total = sum(1 for _ in open(args.path, 'rb'))
-            generator = generators.gen_wordlist(args.path, start_after=resume_password)
+            est_total = generators.count_lines(args.path)
+            generator = generators.gen_wordlist(args.path, offset=resume_offset, batched=True)
+            batched = True
 
         elif args.command == "range":
             if args.min >= args.max:
                 raise ValueError("The 'min' value for range must be less than the 'max' value.")
             est_total = (args.max - args.min) + 1
-            generator = generators.gen_range(args.min, args.max, start_after=resume_password)
+            generator = generators.gen_range(args.min, args.max, offset=resume_offset)
+            stride = (generators.gen_range_slice, (args.min, args.max))
 
         elif args.command == "numeric":
             if args.length <= 0:
                 raise ValueError("The 'length' for numeric mode must be a positive integer.")
             est_total = 10 ** args.length
-            generator = generators.gen_numeric(args.length, start_after=resume_password)
+            if generators_np.HAS_NUMPY:
+                generator = generators_np.gen_numeric_np(args.length, offset=resume_offset)
+                batched = True
+                stride = (generators_np.gen_numeric_np_slice, (args.length,))
+            else:
+                generator = generators.gen_numeric(args.length, offset=resume_offset)
+                stride = (generators.gen_numeric_slice, (args.length,))
 
         elif args.command == "date":
             if args.start_year > args.end_year:
                 raise ValueError("The start year must not be after the end year.")
             est_total = (args.end_year - args.start_year + 1) * 366 # Approximation is fine
-            generator = generators.gen_date(args.start_year, args.end_year, args.format, args.separator, start_after=resume_password)
+            generator = generators.gen_date(args.start_year, args.end_year, args.format, args.separator, offset=resume_offset, batched=True)
+            batched = True
             
         elif args.command == "custom-query":
-             match = re.search(r'\{(\d+)-(\d+)\}', args.query)
+             match = _QUERY_RANGE_RE.search(args.query)
              if match: est_total = int(match.group(2)) - int(match.group(1)) + 1
              else: raise ValueError("Invalid custom-query format. Expected something like 'PREFIX{min-max}SUFFIX'.")
-             generator = generators.gen_custom_query(args.query, args.add_preceding_zeros, start_after=resume_password)
+             generator = generators.gen_custom_query(args.query, args.add_preceding_zeros, offset=resume_offset, batched=True)
+             batched = True
 
         elif args.command == "brute":
             est_total = generators.estimate_total_from_mask(args.mask)
-            generator = generators.gen_from_mask(args.mask, start_after=resume_password)
+            generator = generators.gen_from_mask(args.mask, offset=resume_offset, as_bytes=True)
             if est_total:
                 ui.log(f"Calculated [bold cyan]{est_total:,}[/bold cyan] possible passwords.", "info")
+                stride = (generators.gen_from_mask_slice, (args.mask,))
             else:
                 ui.log("Mask is too complex to estimate total. Progress bar will be indeterminate.", "warning")
 
@@ -183,7 +225,8 @@ def main():
             if len(args.masks) != 2:
                 raise ValueError("Hybrid mode requires exactly two masks (e.g., a wordlist and a mask).")
             est_total = generators.estimate_total_hybrid(args.masks)
-            generator = generators.gen_hybrid(args.masks, start_after=resume_password)
+            generator = generators.gen_hybrid(args.masks, offset=resume_offset, batched=True)
+            batched = True
             if est_total:
                 ui.log(f"Calculated [bold cyan]{est_total:,}[/bold cyan] possible passwords.", "info")
             else:
@@ -193,7 +236,13 @@ def main():
             if args.min_length > args.max_length:
                 raise ValueError("Min length cannot be greater than max length.")
             est_total = generators.estimate_total_custom_brute(args.charset, args.min_length, args.max_length)
-            generator = generators.gen_custom_brute(args.charset, args.min_length, args.max_length, start_after=resume_password)
+            if generators_np.supports_charset(args.charset):
+                generator = generators_np.gen_brute_np(args.min_length, args.max_length, args.charset, offset=resume_offset)
+                batched = True
+                stride = (generators_np.gen_brute_np_slice, (args.min_length, args.max_length, args.charset))
+            else:
+                generator = generators.gen_custom_brute(args.charset, args.min_length, args.max_length, offset=resume_offset)
+                stride = (generators.gen_custom_brute_slice, (args.charset, args.min_length, args.max_length))
             if est_total:
                 ui.log(f"Calculated [bold cyan]{est_total:,}[/bold cyan] possible passwords.", "info")
 
@@ -216,7 +265,8 @@ def main():
         ui.log(f"Mode: [bold]{args.command.upper()}[/bold]", "info")
         found_password = cracker.run_attack(
             args.command, generator, est_total, args.file, args.threads, 
-            args.batch_size, resume_password, args.timeout
+            args.batch_size, resume_offset, args.timeout, args.gpu, batched,
+            length_filter=args.length_filter, session_mode=session_mode, stride=stride
         )
     except (KeyboardInterrupt, SystemExit):
         sys.exit(130)
@@ -229,17 +279,10 @@ def main():
     if found_password:
         database.save_to_db(args.file, found_password)
         if not args.no_decrypt:
-            output_path = Path(args.output_dir)
-            output_path.mkdir(exist_ok=True)
-            decrypted_path = output_path / f"decrypted_{Path(args.file).name}"
-            try:
-                with pikepdf.open(args.file, password=found_password) as pdf:
-                    pdf.save(decrypted_path)
-            except Exception as e:
-                ui.log(f"Could not save decrypted file: {e}", "danger")
-                decrypted_path = None
-
-    ui.print_result(found_password, args.file, decrypted_path)
+            decrypted_path = save_decrypted(args.file, found_password, args.output_dir)
+
+    password_text = pdf_hash.display_password(found_password) if found_password else None
+    ui.print_result(password_text, args.file, decrypted_path)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 # pdfraven/ui.py
+import functools
 import sys
-from rich.console import Console
+from rich.console import Console, Group
 from rich.theme import Theme
 from rich.text import Text
 from rich.panel import Panel
@@ -27,7 +28,9 @@ custom_theme = Theme({
 })
 console = Console(theme=custom_theme)
 
-def print_banner():
+@functools.lru_cache(maxsize=None)
+def _build_banner():
+    """The banner renderables, built once and reused by every print_banner call."""
     banner_text = f"""
     ██████╗ ██████╗ ███████╗██████╗  █████╗ ██╗   ██╗███████╗███╗   ██╗
     ██╔══██╗██╔══██╗██╔════╝██╔══██╗██╔══██╗██║   ██║██╔════╝████╗  ██║
@@ -39,10 +42,14 @@ def print_banner():
     sub_text = "       >> The Advanced PDF Recovery Tool <<\n" \
                f"            Author: Ecnord (GitHub: NoxelEcnord)\n" \
                f"            Version: {VERSION}"
-    
+    return Group(
+        Text(banner_text, style="cyan", justify="center"),
+        Text(sub_text, style="bold blue", justify="center"), # Changed style to bold blue
+    )
+
+def print_banner():
     console.rule(style="banner") # New
-    console.print(Text(banner_text, style="cyan"), justify="center")
-    console.print(Text(sub_text, style="bold blue"), justify="center") # Changed style to bold blue
+    console.print(_build_banner())
     console.print() # Add an extra line for spacing
     console.rule(style="banner") # New
     console.print() # Add an extra line for spacing
@@ -83,11 +90,11 @@ can resume interrupted sessions.
    Flag: --add-preceding-zeros (Pads numbers to match max digit length)
 
 6. [bold]brute[/bold]         : Full brute-force with a defined charset.
-   Usage: pdfraven -f doc.pdf brute "w{4}d{2}"
+   Usage: pdfraven -f doc.pdf brute "w{{4}}d{{2}}"
    (w=lower, W=upper, d=digits, s=symbols, b=space)
 
 7. [bold]hybrid[/bold]         : Combine multiple attack masks.
-   Usage: pdfraven -f doc.pdf hybrid "myword" "d{4}"
+   Usage: pdfraven -f doc.pdf hybrid "myword" "d{{4}}"
    (This will try myword0000, myword0001, ...)
 
 [header]VERBOSITY LEVELS[/header]
@@ -98,11 +105,15 @@ can resume interrupted sessions.
 [header]DATABASE[/header]
 Passwords found are stored in '[bold]found_passwords.json[/bold]'. PDFRaven checks this file 
 before starting any attack. If the PDF hasn't changed, it unlocks instantly.
-    "
+    """
     console.print(manual)
     sys.exit(0)
 
 def get_progress_bar():
+    """
+    Progress bar for an attack. It redraws at most 4 times a second, however
+    often it is updated; callers advance it once per batch (advance=len(batch)).
+    """
     return Progress(
         TextColumn("[progress.description]{task.description}"),
         SpinnerColumn(),
@@ -112,6 +123,7 @@ def get_progress_bar():
         "<",
         TimeRemainingColumn(),
         console=console,
+        refresh_per_second=4,
     )
 
 def print_result(password, pdf_path, decrypted_path):
@@ -0,0 +1,37 @@
+# tests/helpers.py
+# Shared fixtures: small encrypted PDFs built with pikepdf, written to
+# temporary files that are removed when the test finishes.
+import io
+import os
+import tempfile
+import warnings
+
+import pikepdf
+
+USER_PASSWORD = "userpw"
+OWNER_PASSWORD = "ownerpw"
+
+def encrypted_pdf(user=USER_PASSWORD, owner=OWNER_PASSWORD, R=6, pages=1):
+    """Bytes of a PDF with `pages` blank pages, encrypted with revision R."""
+    out = io.BytesIO()
+    # pikepdf rejects its AES and metadata defaults below R=4
+    options = {"aes": False, "metadata": False} if R < 4 else {}
+    with pikepdf.new() as pdf, warnings.catch_warnings():
+        # R=5 is deprecated, but still has to be cracked
+        warnings.simplefilter("ignore", UserWarning)
+        for _ in range(pages):
+            pdf.add_blank_page()
+        pdf.save(out, encryption=pikepdf.Encryption(user=user, owner=owner, R=R, **options))
+    return out.getvalue()
+
+def write_temp(test, data, suffix=".pdf"):
+    """Writes `data` (bytes) to a temporary file deleted after `test`; returns its path."""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    test.addCleanup(os.remove, path)
+    return path
+
+def encrypted_pdf_file(test, **kwargs):
+    """Path of a temporary file holding encrypted_pdf(**kwargs)."""
+    return write_temp(test, encrypted_pdf(**kwargs))
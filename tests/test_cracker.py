@@ -0,0 +1,228 @@
+# tests/test_cracker.py
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from pdfraven import cracker, database, generators, generators_np, pdf_hash
+from tests.helpers import OWNER_PASSWORD, USER_PASSWORD, encrypted_pdf_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a child interpreter so a hang at exit shows up as a timeout
+STRIDE_SCRIPT = """
+import sys
+from pdfraven import cracker, generators, generators_np, pdf_hash
+pdf_path, threads, mode = sys.argv[1], sys.argv[2] == "1", sys.argv[3]
+if mode == "numeric":
+    length = int(sys.argv[4])
+    generator, total = generators.gen_numeric(length), 10 ** length
+    if generators_np.HAS_NUMPY:
+        stride = (generators_np.gen_numeric_np_slice, (length,))
+    else:
+        stride = (generators.gen_numeric_slice, (length,))
+else:
+    charset, min_l, max_l = sys.argv[4], int(sys.argv[5]), int(sys.argv[6])
+    generator = generators.gen_custom_brute(charset, min_l, max_l)
+    total = generators.estimate_total_custom_brute(charset, min_l, max_l)
+    if generators_np.supports_charset(charset):
+        stride = (generators_np.gen_brute_np_slice, (min_l, max_l, charset))
+    else:
+        stride = (generators.gen_custom_brute_slice, (charset, min_l, max_l))
+found = cracker.run_attack(mode, generator, total, pdf_path, workers=4, batch_size=50,
+                           use_threads=threads, stride=stride)
+print("FOUND", found and pdf_hash.display_password(found))
+"""
+
+class WorkerTest(unittest.TestCase):
+    def crack(self, pdf_path, encryption, passwords):
+        cracker._init_worker(pdf_path, encryption)
+        return cracker.attempt_crack_batch(passwords)
+
+    def test_in_process_and_pikepdf_fallback(self):
+        for R in (4, 6):
+            pdf_path = encrypted_pdf_file(self, R=R)
+            for encryption in (pdf_hash.read_encryption(pdf_path), None):
+                with self.subTest(R=R, in_process=encryption is not None):
+                    self.assertEqual(self.crack(pdf_path, encryption, ["a", USER_PASSWORD]), (USER_PASSWORD.encode(), 2))
+                    self.assertEqual(self.crack(pdf_path, encryption, [OWNER_PASSWORD, "b"]), (OWNER_PASSWORD.encode(), 2))
+                    self.assertEqual(self.crack(pdf_path, encryption, ["a", "b", "c"]), (None, 3))
+
+    def test_stop_event(self):
+        pdf_path = encrypted_pdf_file(self, R=4)
+        stop = threading.Event()
+        cracker._init_worker(pdf_path, pdf_hash.read_encryption(pdf_path), stop_event=stop)
+        self.assertEqual(cracker.attempt_crack_chunk((7, [["a"], ["b", "c"]])), (7, None, 3, mock.ANY))
+        stop.set()
+        # An interrupted batch reports nothing tried, so the cursor never passes it
+        self.assertEqual(cracker.attempt_crack_batch([USER_PASSWORD]), (None, 0))
+        self.assertEqual(cracker.attempt_crack_chunk((7, [[USER_PASSWORD]])), (7, None, 0, mock.ANY))
+
+class TunedBatchSizeTest(unittest.TestCase):
+    def test_targets_batch_seconds_within_bounds(self):
+        rate = 5000  # passwords per second
+        self.assertEqual(cracker._tuned_batch_size(1.0, rate), int(rate * cracker.TARGET_BATCH_SECONDS))
+        self.assertEqual(cracker._tuned_batch_size(100.0, 1), cracker.MIN_BATCH_SIZE)
+        self.assertEqual(cracker._tuned_batch_size(1e-9, 1000), cracker.MAX_BATCH_SIZE)
+        self.assertEqual(cracker._tuned_batch_size(0, 0), cracker.MAX_BATCH_SIZE)
+
+class VerifierChoiceTest(unittest.TestCase):
+    def test_picks_faster_verifier(self):
+        for R in (4, 6):
+            pdf_path = encrypted_pdf_file(self, R=R)
+            info = pdf_hash.read_encryption(pdf_path)
+            with self.subTest(R=R):
+                with mock.patch.object(pdf_hash, "make_verifier", return_value=lambda passwords: None):
+                    self.assertTrue(cracker._in_process_is_faster(pdf_path, info))
+                slow = lambda passwords: time.sleep(len(passwords) * 0.05)
+                with mock.patch.object(pdf_hash, "make_verifier", return_value=slow):
+                    # R>=5 has no cheaper alternative, so it is never probed
+                    self.assertEqual(cracker._in_process_is_faster(pdf_path, info), R >= 5)
+
+    def test_unreadable_by_pikepdf(self):
+        info = pdf_hash.read_encryption(encrypted_pdf_file(self, R=4))
+        slow = lambda passwords: time.sleep(len(passwords) * 0.05)
+        with mock.patch.object(pdf_hash, "make_verifier", return_value=slow):
+            self.assertTrue(cracker._in_process_is_faster("missing.pdf", info))
+
+class SessionDirTestCase(unittest.TestCase):
+    """Keeps the sessions written by run_attack in a temporary directory."""
+
+    def setUp(self):
+        session_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, session_dir)
+        self.addCleanup(setattr, database, "SESSION_DIR", database.SESSION_DIR)
+        database.SESSION_DIR = session_dir
+
+class RunAttackTest(SessionDirTestCase):
+    def run_attack(self, candidates, pdf_path, **kwargs):
+        kwargs.setdefault("batch_size", 3)
+        return cracker.run_attack("Test", iter(candidates), len(candidates), pdf_path, 2, **kwargs)
+
+    def test_finds_password(self):
+        pdf_path = encrypted_pdf_file(self, R=4)
+        candidates = ["w%d" % i for i in range(500)] + [USER_PASSWORD] + ["x", "y"]
+        self.assertEqual(self.run_attack(candidates, pdf_path), USER_PASSWORD.encode())
+
+    def test_auto_tuned(self):
+        pdf_path = encrypted_pdf_file(self, R=4)
+        candidates = ["w%d" % i for i in range(2000)] + [USER_PASSWORD]
+        self.assertEqual(self.run_attack(candidates, pdf_path, batch_size=None), USER_PASSWORD.encode())
+        # A hit inside the timed probe
+        self.assertEqual(self.run_attack(["a", OWNER_PASSWORD], pdf_path, batch_size=None), OWNER_PASSWORD.encode())
+
+    def test_thread_and_process_pools(self):
+        pdf_path = encrypted_pdf_file(self, R=6)
+        candidates = ["w%d" % i for i in range(20)] + [USER_PASSWORD]
+        for use_threads in (True, False):
+            with self.subTest(use_threads=use_threads):
+                self.assertEqual(self.run_attack(candidates, pdf_path, use_threads=use_threads), USER_PASSWORD.encode())
+
+    def test_length_filter(self):
+        pdf_path = encrypted_pdf_file(self, R=4)
+        candidates = ["a", "bb", USER_PASSWORD, "ccccccc"]
+        self.assertIsNone(self.run_attack(candidates, pdf_path, length_filter=(1, 5)))
+        self.assertEqual(self.run_attack(candidates, pdf_path, length_filter=(6, 6)), USER_PASSWORD.encode())
+
+    def test_exhausts_without_hit(self):
+        pdf_path = encrypted_pdf_file(self, R=4)
+        self.assertIsNone(self.run_attack(["w%d" % i for i in range(100)], pdf_path))
+
+class StrideAttackTest(SessionDirTestCase):
+    def run_stride(self, pdf_path, stride, total, **kwargs):
+        kwargs.setdefault("use_threads", False)
+        return cracker.run_attack("Stride", iter(()), total, pdf_path, 2, 5, stride=stride, **kwargs)
+
+    def test_finds_password_in_any_stripe(self):
+        brute = (generators.gen_custom_brute_slice, ("abc", 1, 3))
+        if generators_np.HAS_NUMPY:
+            brute = (generators_np.gen_brute_np_slice, (1, 3, "abc"))
+        cases = [
+            ("cab", brute, 39),
+            # Not one byte per character, so only the pure-Python slice applies
+            ("bä", (generators.gen_custom_brute_slice, ("aäb", 1, 3)), 39),
+            ("417", (generators.gen_numeric_slice, (3,)), 1000),
+            ("b07", (generators.gen_from_mask_slice, ("hd{2}",)), 1600),
+        ]
+        for password, stride, total in cases:
+            with self.subTest(stride=stride[0].__name__):
+                pdf_path = encrypted_pdf_file(self, user=password, R=4)
+                self.assertEqual(self.run_stride(pdf_path, stride, total), password.encode("latin-1"))
+
+    def test_exhausts_without_hit(self):
+        pdf_path = encrypted_pdf_file(self, R=4)
+        self.assertIsNone(self.run_stride(pdf_path, (generators.gen_range_slice, (0, 99)), 100))
+
+    def test_resumes_from_start(self):
+        pdf_path = encrypted_pdf_file(self, user="0042", R=4)
+        stride = (generators.gen_numeric_slice, (4,))
+        self.assertIsNone(self.run_stride(pdf_path, stride, 10 ** 4, start=43))
+        self.assertEqual(self.run_stride(pdf_path, stride, 10 ** 4, start=40), b"0042")
+
+class StrideThreadsTest(SessionDirTestCase):
+    def run_stride(self, password, R, threads, *mode_args):
+        pdf_path = encrypted_pdf_file(self, user=password, R=R)
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        result = subprocess.run(
+            [sys.executable, "-c", STRIDE_SCRIPT, pdf_path, "1" if threads else "0", *map(str, mode_args)],
+            cwd=database.SESSION_DIR, env=env, capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn(f"FOUND {password}", result.stdout)
+
+    def test_threads_without_auto_tune(self):
+        # Fixed batch size: the first kernel call happens inside the pool threads
+        self.run_stride("417", 4, True, "numeric", 3)
+
+    def test_threads_r6(self):
+        self.run_stride("093", 6, True, "numeric", 3)
+
+    def test_custom_brute_threads(self):
+        self.run_stride("cab", 6, True, "custom-brute", "abc", 1, 3)
+
+    def test_custom_brute_non_ascii_charset(self):
+        # Not one byte per character, so this takes the pure-Python slice
+        self.run_stride("bä", 4, True, "custom-brute", "aäb", 1, 2)
+
+class SessionResumeTest(SessionDirTestCase):
+    """A timed-out attack saves a cursor; resuming from it leaves no gap and repeats nothing."""
+
+    MODE = "numeric 3"
+    TOTAL = 10 ** 3
+
+    def run_recorded(self, pdf_path, start, timeout):
+        tried = []
+        original = cracker.attempt_crack_batch
+
+        def slow_batch(passwords):
+            # The sleep dominates, so the first run times out part-way on any machine
+            time.sleep(0.05)
+            tried.extend(pdf_hash.decode_password(p) for p in passwords)
+            return original(passwords)
+
+        with mock.patch.object(cracker, "attempt_crack_batch", slow_batch):
+            found = cracker.run_attack("Numeric", generators.gen_numeric(3, offset=start), self.TOTAL, pdf_path, 2, 10,
+                                       start=start, timeout=timeout, use_threads=True, session_mode=self.MODE)
+        self.assertIsNone(found)
+        return tried
+
+    def test_timeout_and_resume(self):
+        pdf_path = encrypted_pdf_file(self, R=4)
+        expected = [f"{i:03d}" for i in range(self.TOTAL)]
+
+        first_run = set(self.run_recorded(pdf_path, 0, timeout=1))
+        cursor = database.load_session(pdf_path, self.MODE)
+        self.assertIsNotNone(cursor)
+        self.assertTrue(0 < cursor < self.TOTAL)
+        self.assertLessEqual(set(expected[:cursor]), first_run)
+
+        second_run = self.run_recorded(pdf_path, cursor, timeout=None)
+        self.assertEqual(sorted(second_run), expected[cursor:])
+
+if __name__ == "__main__":
+    unittest.main()
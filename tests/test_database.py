@@ -0,0 +1,100 @@
+# tests/test_database.py
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pdfraven import database
+from tests.helpers import USER_PASSWORD, encrypted_pdf_file
+
+class DatabaseTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.addCleanup(setattr, database, "DB_FILE", database.DB_FILE)
+        database.DB_FILE = os.path.join(tmp_dir, "found.json")
+        database._DB_CACHE = None
+        self.pdf_path = encrypted_pdf_file(self, R=4)
+
+    def read_file(self):
+        with open(database.DB_FILE) as f:
+            return json.load(f)
+
+    def test_save_and_check(self):
+        self.assertIsNone(database.check_db_for_password(self.pdf_path))
+        database.save_to_db(self.pdf_path, USER_PASSWORD)
+        self.assertEqual(database.check_db_for_password(self.pdf_path), USER_PASSWORD)
+        self.assertFalse(os.path.exists(database.DB_FILE + ".tmp"))
+
+    def test_exact_bytes_kept(self):
+        # Latin-1 bytes are not valid UTF-8, so they are stored alongside the text
+        database.save_to_db(self.pdf_path, b"caf\xe9")
+        entry, = self.read_file().values()
+        self.assertEqual(entry["password"], "café")
+        database._DB_CACHE = None
+        self.assertEqual(database.check_db_for_password(self.pdf_path), b"caf\xe9")
+        database.save_to_db(self.pdf_path, "café".encode())
+        self.assertNotIn("password_hex", next(iter(self.read_file().values())))
+
+    def test_hit_after_rename(self):
+        database.save_to_db(self.pdf_path, USER_PASSWORD)
+        moved = os.path.join(os.path.dirname(database.DB_FILE), "moved.pdf")
+        shutil.copy(self.pdf_path, moved)
+        self.assertEqual(database.check_db_for_password(moved), USER_PASSWORD)
+        self.assertEqual(len(self.read_file()), 1)
+
+    def test_miss_after_content_change(self):
+        database.save_to_db(self.pdf_path, USER_PASSWORD)
+        with open(self.pdf_path, "ab") as f:
+            f.write(b"\n%changed\n")
+        self.assertIsNone(database.check_db_for_password(self.pdf_path))
+
+    def test_rewrite_is_atomic(self):
+        database.save_to_db(self.pdf_path, USER_PASSWORD)
+        before = self.read_file()
+        other_pdf = encrypted_pdf_file(self, R=6)
+        # The new contents go to a temporary file first; a failed rename leaves the old file
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            database.save_to_db(other_pdf, USER_PASSWORD)
+        self.assertEqual(self.read_file(), before)
+        # Neither is the cached copy changed
+        self.assertEqual(database.load_db(), before)
+
+    def write_legacy(self, password):
+        with open(database.DB_FILE, "w") as f:
+            json.dump({os.path.realpath(self.pdf_path): password}, f)
+
+    def test_legacy_entry_migrated_once(self):
+        self.write_legacy(USER_PASSWORD)
+        with mock.patch.object(database.pikepdf, "open", wraps=database.pikepdf.open) as pdf_open:
+            self.assertEqual(database.check_db_for_password(self.pdf_path), USER_PASSWORD)
+            self.assertEqual(database.check_db_for_password(self.pdf_path), USER_PASSWORD)
+        # Tested once, then found under the file's hash
+        self.assertEqual(pdf_open.call_count, 1)
+        self.assertEqual(list(self.read_file().values()),
+                         [{"password": USER_PASSWORD, "path": os.path.realpath(self.pdf_path)}])
+
+    def test_failed_migration_keeps_cache(self):
+        self.write_legacy(USER_PASSWORD)
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            self.assertEqual(database.check_db_for_password(self.pdf_path), USER_PASSWORD)
+        self.assertEqual(database.load_db(), self.read_file())
+
+    def test_stale_legacy_entry_removed(self):
+        self.write_legacy("wrong")
+        self.assertIsNone(database.check_db_for_password(self.pdf_path))
+        self.assertEqual(self.read_file(), {})
+
+    def test_reloads_after_external_change(self):
+        database.save_to_db(self.pdf_path, USER_PASSWORD)
+        self.assertTrue(database.load_db())
+        with open(database.DB_FILE, "w") as f:
+            json.dump({}, f)
+        stat = os.stat(database.DB_FILE)
+        os.utime(database.DB_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(database.load_db(), {})
+
+if __name__ == "__main__":
+    unittest.main()
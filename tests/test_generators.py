@@ -0,0 +1,267 @@
+# tests/test_generators.py
+import datetime
+import itertools
+import unittest
+from unittest import mock
+
+from pdfraven import generators, generators_np
+from pdfraven.config import CHARSET_MAP
+from tests.helpers import write_temp
+
+def rows(batches):
+    """Flattens batches of uint8 rows into a list of bytes."""
+    return [bytes(row) for batch in batches for row in batch]
+
+def product(charset, min_l, max_l):
+    return [''.join(p).encode() for n in range(min_l, max_l + 1) for p in itertools.product(charset, repeat=n)]
+
+class CountLinesTest(unittest.TestCase):
+    def test_counts_like_iteration(self):
+        for data in (b"", b"\n", b"a", b"a\nb", b"a\nb\n", b"a\r\nb\r\n\n", b"x\n" * 1000 + b"y"):
+            path = write_temp(self, data, suffix=".txt")
+            with open(path, "rb") as f:
+                expected = sum(1 for _ in f)
+            for chunk_size in (1, 3, 64 << 20):
+                with self.subTest(data=data[:12], chunk_size=chunk_size):
+                    self.assertEqual(generators.count_lines(path, chunk_size=chunk_size), expected)
+
+class WordlistTest(unittest.TestCase):
+    def test_line_endings_and_spaces(self):
+        cases = {
+            b"alpha\nbeta\n": [b"alpha", b"beta"],
+            b"alpha\r\nbeta\r\ngamma": [b"alpha", b"beta", b"gamma"],
+            b" lead\ntrail \n\nlast": [b" lead", b"trail ", b"", b"last"],
+            b"caf\xe9\n": [b"caf\xe9"],
+            b"": [],
+        }
+        for data, expected in cases.items():
+            with self.subTest(data=data):
+                path = write_temp(self, data, suffix=".txt")
+                self.assertEqual(list(generators.gen_wordlist(path)), expected)
+
+    def test_lines_split_across_chunks(self):
+        data = b"alpha\nbeta\ngamma\n\ndelta"
+        path = write_temp(self, data, suffix=".txt")
+        for chunk_size in range(1, len(data) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(generators.gen_wordlist(path, chunk_size=chunk_size)),
+                                 [b"alpha", b"beta", b"gamma", b"", b"delta"])
+
+    def test_crlf_split_across_chunks(self):
+        data = b"alpha\r\nbeta\r\n\r\ngamma"
+        path = write_temp(self, data, suffix=".txt")
+        for chunk_size in range(1, len(data) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(generators.gen_wordlist(path, chunk_size=chunk_size)), [b"alpha", b"beta", b"", b"gamma"])
+
+class DateTest(unittest.TestCase):
+    FORMATS = {
+        "DDMMYYYY": "%d{0}%m{0}%Y", "YYYYMMDD": "%Y{0}%m{0}%d", "MMDDYYYY": "%m{0}%d{0}%Y",
+        "DDMMYY": "%d{0}%m{0}%y", "YYMMDD": "%y{0}%m{0}%d", "MMDDYY": "%m{0}%d{0}%y",
+    }
+
+    def test_every_day_in_order(self):
+        first, last = datetime.date(1999, 1, 1), datetime.date(2001, 12, 31)
+        days = [first + datetime.timedelta(n) for n in range((last - first).days + 1)]
+        for date_format, pattern in self.FORMATS.items():
+            for separator in ("", "-"):
+                with self.subTest(date_format=date_format, separator=separator):
+                    expected = [day.strftime(pattern.format(separator)) for day in days]
+                    self.assertEqual(list(generators.gen_date(1999, 2001, date_format, separator)), expected)
+
+class RangeNumericTest(unittest.TestCase):
+    def test_values(self):
+        self.assertEqual(list(generators.gen_range(8, 11)), ["8", "9", "10", "11"])
+        self.assertEqual(list(generators.gen_range(8, 11, offset=3)), ["11"])
+        self.assertEqual(list(generators.gen_numeric(3)), ["%03d" % i for i in range(1000)])
+
+class CustomQueryTest(unittest.TestCase):
+    def test_padding_and_bytes(self):
+        self.assertEqual(list(generators.gen_custom_query("pw{8-11}!", True)), [b"pw08!", b"pw09!", b"pw10!", b"pw11!"])
+        self.assertEqual(list(generators.gen_custom_query("pw{8-11}!", False)), [b"pw8!", b"pw9!", b"pw10!", b"pw11!"])
+        self.assertEqual(list(generators.gen_custom_query("\u00e9{1-2}", False)), [b"\xc3\xa91", b"\xc3\xa92"])
+        self.assertEqual(list(generators.gen_custom_query("5%{1-2}%d", False)), [b"5%1%d", b"5%2%d"])
+        self.assertEqual(list(generators.gen_custom_query("no range", False)), [])
+
+class HybridTest(unittest.TestCase):
+    def test_wordlist_part_counts_last_line(self):
+        path = write_temp(self, b"alpha\r\nbeta\ngamma", suffix=".txt")
+        generator, count = generators.get_generator_for_mask(path)
+        self.assertEqual(count, 3)
+        self.assertEqual(list(generator), ["alpha", "beta", "gamma"])
+        self.assertEqual(list(generators.gen_hybrid([path, "d"]))[9:11], ["alpha9", "beta0"])
+
+    def test_wordlists_counted_once(self):
+        path = write_temp(self, b"alpha\nbeta\ngamma\n", suffix=".txt")
+        for limit in (generators.HYBRID_CACHE_LIMIT, 1):
+            with self.subTest(cached=limit > 1), mock.patch.object(generators, "HYBRID_CACHE_LIMIT", limit), \
+                    mock.patch.object(generators, "count_lines", wraps=generators.count_lines) as count_lines:
+                combined = list(generators.gen_hybrid([path, path], offset=4))
+                self.assertEqual(combined, [a + b for a in ("alpha", "beta", "gamma") for b in ("alpha", "beta", "gamma")][4:])
+                # Only the second wordlist is sized, and only once
+                self.assertEqual(count_lines.call_count, 1)
+
+class MaskTest(unittest.TestCase):
+    def test_segment_order(self):
+        digits, upper = CHARSET_MAP["d"], CHARSET_MAP["W"]
+        heads = ["", *digits, *(x + y for x in digits for y in digits)]
+        self.assertEqual(list(generators.gen_from_mask("d{0,2}W")), [h + c for h in heads for c in upper])
+
+    def test_as_bytes(self):
+        for mask in ("d{0,2}W", "sb{1,2}a"):
+            with self.subTest(mask=mask):
+                expected = [p.encode() for p in generators.gen_from_mask(mask)]
+                self.assertEqual(list(generators.gen_from_mask(mask, as_bytes=True)), expected)
+                with mock.patch.object(generators, "SEGMENT_CACHE_LIMIT", 5):
+                    self.assertEqual(list(generators.gen_from_mask(mask, as_bytes=True)), expected)
+                    self.assertEqual(list(generators.gen_from_mask(mask, offset=7, as_bytes=True)), expected[7:])
+
+    def test_parse_mask_is_cached(self):
+        parsed = generators.parse_mask("wd{1,2}")
+        self.assertIsInstance(parsed, tuple)
+        self.assertIs(generators.parse_mask("wd{1,2}"), parsed)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                generators.parse_mask("x{2}")
+
+    def test_lazy_first_segment(self):
+        expected = list(generators.gen_from_mask("d{1,2}h{0,1}"))
+        with mock.patch.object(generators, "SEGMENT_CACHE_LIMIT", 5):
+            self.assertEqual(list(generators.gen_from_mask("d{1,2}h{0,1}")), expected)
+            for k in (1, 16, 17, 100, len(expected) - 1, len(expected)):
+                with self.subTest(offset=k):
+                    self.assertEqual(list(generators.gen_from_mask("d{1,2}h{0,1}", offset=k)), expected[k:])
+
+class OffsetTest(unittest.TestCase):
+    """gen(offset=k) must yield exactly gen()[k:], which is what session resume relies on."""
+
+    def assertSeeks(self, make, flatten=list, offsets=None):
+        full = flatten(make(0))
+        n = len(full)
+        if offsets is None:
+            offsets = range(n + 2) if n <= 200 else sorted({1, 2, n // 3, n // 2, n - 2, n - 1, n, n + 1})
+        for k in offsets:
+            with self.subTest(offset=k):
+                self.assertEqual(flatten(make(k)), full[k:])
+
+    def test_wordlist(self):
+        for data in (b"a\nbb\n\nccc\nd", b"a\r\nbb\r\n\r\nccc\r\nd\r\n", b"one"):
+            path = write_temp(self, data, suffix=".txt")
+            for chunk_size in (1, 2, 5, 4 << 20):
+                with self.subTest(data=data, chunk_size=chunk_size):
+                    self.assertSeeks(lambda k: generators.gen_wordlist(path, offset=k, chunk_size=chunk_size))
+
+    def test_range_numeric_and_query(self):
+        self.assertSeeks(lambda k: generators.gen_range(7, 40, offset=k))
+        self.assertSeeks(lambda k: generators.gen_numeric(2, offset=k))
+        self.assertSeeks(lambda k: generators.gen_custom_query("ab{5-30}cd", True, offset=k))
+
+    def test_date(self):
+        self.assertSeeks(lambda k: generators.gen_date(1999, 2001, "DDMMYY", "/", offset=k),
+                         offsets=[1, 58, 59, 364, 365, 366, 424, 425, 730, 731, 1095, 1096, 1097])
+
+    def test_mask(self):
+        self.assertSeeks(lambda k: generators.gen_from_mask("d{1,2}h", offset=k))
+        self.assertSeeks(lambda k: generators.gen_from_mask("wd{0,1}", offset=k))
+        # 10**12 candidates: only a direct seek reaches the last ones
+        self.assertEqual(list(generators.gen_from_mask("d" * 12, offset=10 ** 12 - 2)), ["999999999998", "999999999999"])
+
+    def test_custom_brute(self):
+        self.assertSeeks(lambda k: generators.gen_custom_brute("xyz", 1, 3, offset=k))
+        # 10**12 candidates of length 12: only a direct seek reaches the last one
+        self.assertEqual(list(generators.gen_custom_brute("0123456789", 12, 12, offset=10 ** 12 - 1)), ["9" * 12])
+
+    def test_hybrid(self):
+        path = write_temp(self, b"alpha\r\nbeta\ngamma", suffix=".txt")
+        self.assertSeeks(lambda k: generators.gen_hybrid([path, "d{1,2}"], offset=k))
+        self.assertSeeks(lambda k: generators.gen_hybrid(["d", path], offset=k))
+        self.assertSeeks(lambda k: generators.gen_hybrid(["w", "3-9"], offset=k))
+
+    @unittest.skipUnless(generators_np.HAS_NUMPY, "needs NumPy")
+    def test_brute_numpy(self):
+        for batch in (1, 7, 100_000):
+            with self.subTest(batch=batch):
+                self.assertSeeks(lambda k: generators_np.gen_brute_np(1, 3, "abcd", batch=batch, offset=k), flatten=rows)
+
+    @unittest.skipUnless(generators_np.HAS_NUMPY, "needs NumPy")
+    def test_numeric_numpy(self):
+        self.assertEqual(rows(generators_np.gen_numeric_np(3, batch=64)), [p.encode() for p in generators.gen_numeric(3)])
+        self.assertSeeks(lambda k: generators_np.gen_numeric_np(2, batch=7, offset=k), flatten=rows)
+
+class BatchedTest(unittest.TestCase):
+    """batched=True must yield the same candidates, in lists of at most GEN_BATCH_SIZE."""
+
+    def assertBatches(self, make):
+        for offset in (0, 5):
+            with self.subTest(offset=offset):
+                batches = list(make(offset=offset, batched=True))
+                self.assertTrue(all(0 < len(batch) <= 7 for batch in batches))
+                self.assertEqual([p for batch in batches for p in batch], list(make(offset=offset)))
+
+    def test_generators(self):
+        path = write_temp(self, b"alpha\r\nbeta\n\ngamma\n" * 5 + b"last", suffix=".txt")
+        with mock.patch.object(generators, "GEN_BATCH_SIZE", 7):
+            self.assertBatches(lambda **kw: generators.gen_wordlist(path, chunk_size=8, **kw))
+            self.assertBatches(lambda **kw: generators.gen_date(1999, 2001, "YYMMDD", "-", **kw))
+            self.assertBatches(lambda **kw: generators.gen_custom_query("a%{1-30}b", True, **kw))
+            self.assertBatches(lambda **kw: generators.gen_hybrid([path, "d"], **kw))
+
+class SliceTest(unittest.TestCase):
+    """Blocks lo..hi-1 laid end to end must rebuild the whole keyspace."""
+
+    def assertTiles(self, full, make_slice, flatten=lambda batches: [p for batch in batches for p in batch]):
+        for block in (1, 7, len(full)):
+            with self.subTest(block=block):
+                tiled = []
+                for lo in range(0, len(full), block):
+                    tiled += flatten(make_slice(lo, min(len(full), lo + block)))
+                self.assertEqual(tiled, full)
+
+    def test_slices(self):
+        self.assertTiles(list(generators.gen_range(7, 40)), lambda lo, hi: generators.gen_range_slice(7, 40, lo, hi))
+        self.assertTiles(list(generators.gen_numeric(2)), lambda lo, hi: generators.gen_numeric_slice(2, lo, hi))
+        self.assertTiles(list(generators.gen_from_mask("d{1,2}h", as_bytes=True)),
+                         lambda lo, hi: generators.gen_from_mask_slice("d{1,2}h", lo, hi))
+        self.assertTiles(list(generators.gen_custom_brute("xäz", 1, 3)),
+                         lambda lo, hi: generators.gen_custom_brute_slice("xäz", 1, 3, lo, hi))
+
+    @unittest.skipUnless(generators_np.HAS_NUMPY, "needs NumPy")
+    def test_numpy_slices(self):
+        self.assertTiles(product("abcd", 1, 3), lambda lo, hi: generators_np.gen_brute_np_slice(1, 3, "abcd", lo, hi), flatten=rows)
+        self.assertTiles(rows(generators_np.gen_numeric_np(2)), lambda lo, hi: generators_np.gen_numeric_np_slice(2, lo, hi), flatten=rows)
+
+@unittest.skipUnless(generators_np.HAS_NUMPY, "needs NumPy")
+class BruteNumpyTest(unittest.TestCase):
+    def test_matches_product_order(self):
+        for batch in (1, 7, 100_000):
+            with self.subTest(batch=batch):
+                self.assertEqual(rows(generators_np.gen_brute_np(1, 3, "abc", batch=batch)), product("abc", 1, 3))
+
+    def test_matches_custom_brute(self):
+        expected = [p.encode() for p in generators.gen_custom_brute("x1-", 2, 3)]
+        self.assertEqual(rows(generators_np.gen_brute_np(2, 3, "x1-", batch=5)), expected)
+
+    def test_past_int64_indices(self):
+        # 2**64 candidates of length 64; the batches straddle index 2**63 - 1
+        start = 2 ** 63 - 3
+        expected = [p.encode() for p in itertools.islice(generators.gen_custom_brute("ab", 64, 64, offset=start), 7)]
+        self.assertEqual(rows(generators_np.gen_brute_np_slice(64, 64, "ab", start, start + 7)), expected)
+        batches = itertools.islice(generators_np.gen_brute_np(64, 64, "ab", batch=2, offset=start), 4)
+        self.assertEqual(rows(batches)[:7], expected)
+
+    def test_empty_slice(self):
+        self.assertEqual(list(generators_np.gen_brute_np_slice(1, 3, "abc", 5, 5)), [])
+
+    @unittest.skipUnless(generators_np.HAS_NUMBA, "needs Numba")
+    def test_kernel_matches_divmod_path(self):
+        import numpy as np
+        cs = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+        # The last case carries across several digits at once
+        for start, count, length in ((0, 10, 3), (4070, 26, 3), (123456, 5000, 6), (0xffff0, 9000, 6)):
+            out = np.empty((count, length), dtype=np.uint8)
+            generators_np.fill_brute_batch(out, start, cs)
+            expected = ["%0*x" % (length, i) for i in range(start, start + count)]
+            self.assertEqual([bytes(row).decode() for row in out], expected)
+
+if __name__ == "__main__":
+    unittest.main()
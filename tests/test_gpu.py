@@ -0,0 +1,33 @@
+# tests/test_gpu.py
+import unittest
+
+from pdfraven import gpu, pdf_hash
+from tests.helpers import OWNER_PASSWORD, USER_PASSWORD, encrypted_pdf_file
+
+class SupportsTest(unittest.TestCase):
+    def test_sha2_revisions_only(self):
+        for R in (2, 3, 4, 5, 6):
+            info = pdf_hash.read_encryption(encrypted_pdf_file(self, R=R))
+            self.assertEqual(gpu.supports(info), R >= 5)
+        self.assertFalse(gpu.supports(None))
+
+@unittest.skipUnless(gpu.is_available(), "needs CuPy and a CUDA device")
+class VerifyBatchTest(unittest.TestCase):
+    def test_matches_cpu_verifier(self):
+        user, owner = USER_PASSWORD.encode(), OWNER_PASSWORD.encode()
+        batches = [
+            [b"a", user, b"b"],
+            [b"a", b"b", owner],
+            [owner, user],
+            [b"a", b"", b"x" * 200],
+            [b"miss%d" % i for i in range(1000)] + [user],
+        ]
+        for R in (5, 6):
+            info = pdf_hash.read_encryption(encrypted_pdf_file(self, R=R))
+            verify, gpu_verify = pdf_hash.make_verifier(info), gpu.make_verifier(info)
+            for passwords in batches:
+                with self.subTest(R=R, passwords=passwords[:3]):
+                    self.assertEqual(gpu_verify(passwords), verify(passwords))
+
+if __name__ == "__main__":
+    unittest.main()
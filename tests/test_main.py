@@ -0,0 +1,80 @@
+# tests/test_main.py
+# Runs the command line end to end in a subprocess, with every file it
+# writes kept in a temporary directory.
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from tests.helpers import encrypted_pdf_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+
+    def run_cli(self, pdf_path, *args):
+        command = [sys.executable, "-m", "pdfraven.main", "-f", pdf_path, "-t", "1",
+                   "--db-file", os.path.join(self.workdir, "found.json"),
+                   "--session-dir", os.path.join(self.workdir, "sessions"),
+                   "--output-dir", os.path.join(self.workdir, "out"), *args]
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        return subprocess.run(command, cwd=self.workdir, env=env, capture_output=True, text=True, timeout=120)
+
+    def decrypted(self, pdf_path):
+        return os.path.join(self.workdir, "out", "decrypted_" + os.path.basename(pdf_path))
+
+    def test_custom_query(self):
+        pdf_path = encrypted_pdf_file(self, user="pw037", R=4)
+        result = self.run_cli(pdf_path, "custom-query", "pw{1-100}", "--add-preceding-zeros")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertTrue(os.path.isfile(self.decrypted(pdf_path)))
+
+    def test_database_hit_honours_no_decrypt(self):
+        pdf_path = encrypted_pdf_file(self, user="pw037", R=4)
+        self.assertEqual(self.run_cli(pdf_path, "--no-decrypt", "custom-query", "pw{1-100}", "--add-preceding-zeros").returncode, 0)
+        self.assertFalse(os.path.exists(self.decrypted(pdf_path)))
+        # The second run finds the password in the database
+        result = self.run_cli(pdf_path, "--no-decrypt", "range", "1", "2")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertFalse(os.path.exists(self.decrypted(pdf_path)))
+        self.assertEqual(self.run_cli(pdf_path, "range", "1", "2").returncode, 0)
+        self.assertTrue(os.path.isfile(self.decrypted(pdf_path)))
+
+    def test_non_ascii_password(self):
+        # RC4 documents take the Latin-1 bytes; either wordlist encoding must
+        # find them, decrypt the file and leave a database entry that opens it
+        pdf_path = encrypted_pdf_file(self, user="café", R=4)
+        for encoding in ("utf-8", "latin-1"):
+            with self.subTest(encoding=encoding):
+                wordlist = os.path.join(self.workdir, "words.txt")
+                with open(wordlist, "wb") as f:
+                    f.write("cafe\n".encode() + "café\n".encode(encoding))
+                for path in (os.path.join(self.workdir, "found.json"), self.decrypted(pdf_path)):
+                    if os.path.exists(path):
+                        os.remove(path)
+                result = self.run_cli(pdf_path, "wordlist", wordlist)
+                self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+                self.assertIn("café", result.stdout)
+                self.assertTrue(os.path.isfile(self.decrypted(pdf_path)))
+
+                os.remove(self.decrypted(pdf_path))
+                result = self.run_cli(pdf_path, "range", "1", "2")
+                self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+                self.assertIn("Database has the password", result.stdout)
+                self.assertTrue(os.path.isfile(self.decrypted(pdf_path)))
+
+    def test_length_filter_bounds(self):
+        pdf_path = encrypted_pdf_file(self, R=4)
+        for bounds in (("-1", "4"), ("5", "4")):
+            with self.subTest(bounds=bounds):
+                result = self.run_cli(pdf_path, "--length-filter", *bounds, "range", "1", "2")
+                self.assertEqual(result.returncode, 2)
+                self.assertIn("--length-filter needs 0 <= MIN <= MAX", result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# tests/test_pdf_hash.py
+import re
+import unittest
+
+from pdfraven import pdf_hash
+from tests.helpers import OWNER_PASSWORD, USER_PASSWORD, encrypted_pdf, encrypted_pdf_file, write_temp
+
+def with_indirect(data, pattern, num, value):
+    """Replaces the first match of `pattern` with a reference to a new object holding `value`."""
+    data = re.sub(pattern, lambda m: m.group(1) + b" %d 0 R" % num, data, count=1)
+    # Only read_encryption sees these files, so stale xref offsets do not matter
+    header_end = data.index(b"\n") + 1
+    return data[:header_end] + b"%d 0 obj\n%s\nendobj\n" % (num, value) + data[header_end:]
+
+class ReadEncryptionTest(unittest.TestCase):
+    def test_revisions(self):
+        for R in (2, 3, 4, 5, 6):
+            with self.subTest(R=R):
+                info = pdf_hash.read_encryption(encrypted_pdf_file(self, R=R))
+                self.assertEqual(info.R, R)
+                self.assertEqual(len(info.ID), 16)
+
+    def test_unencrypted_file(self):
+        path = encrypted_pdf_file(self)
+        with open(path, "rb") as f:
+            data = f.read().replace(b"/Encrypt", b"/Xncrypt")
+        with open(path, "wb") as f:
+            f.write(data)
+        with self.assertRaises(ValueError):
+            pdf_hash.read_encryption(path)
+
+    def test_indirect_permissions(self):
+        data = encrypted_pdf(R=4)
+        permissions = int(re.search(rb"/P (-?\d+)", data).group(1))
+        info = pdf_hash.read_encryption(write_temp(self, with_indirect(data, rb"(/P) -?\d+", 900, b"%d" % permissions)))
+        self.assertEqual(info.P, permissions & 0xFFFFFFFF)
+        self.assertEqual(pdf_hash.make_verifier(info)([USER_PASSWORD.encode()]), USER_PASSWORD.encode())
+
+    def test_indirect_id(self):
+        # Strings in indirect objects are encrypted, so R<=4 cannot use them
+        data = encrypted_pdf(R=4)
+        id_array = re.search(rb"/ID ?(\[[^\]]*\])", data).group(1)
+        with self.assertRaises(ValueError):
+            pdf_hash.read_encryption(write_temp(self, with_indirect(data, rb"(/ID) ?\[[^\]]*\]", 901, id_array)))
+
+        # R6 does not use the ID at all
+        data = encrypted_pdf(R=6)
+        id_array = re.search(rb"/ID ?(\[[^\]]*\])", data).group(1)
+        info = pdf_hash.read_encryption(write_temp(self, with_indirect(data, rb"(/ID) ?\[[^\]]*\]", 901, id_array)))
+        self.assertEqual(pdf_hash.make_verifier(info)([USER_PASSWORD.encode()]), USER_PASSWORD.encode())
+
+class MakeVerifierTest(unittest.TestCase):
+    def test_first_match(self):
+        for R in (2, 3, 4, 5, 6):
+            with self.subTest(R=R):
+                verify = pdf_hash.make_verifier(pdf_hash.read_encryption(encrypted_pdf_file(self, R=R)))
+                user, owner = USER_PASSWORD.encode(), OWNER_PASSWORD.encode()
+                self.assertEqual(verify([b"a", b"b", user, owner]), user)
+                self.assertEqual(verify([b"a", owner]), owner)
+                self.assertIsNone(verify([b"wrong", b""]))
+                self.assertIsNone(verify([]))
+
+    def test_reused_across_batches(self):
+        for R in (2, 3, 4, 5, 6):
+            with self.subTest(R=R):
+                verify = pdf_hash.make_verifier(pdf_hash.read_encryption(encrypted_pdf_file(self, user="päss", R=R)))
+                # RC4 documents take the Latin-1 bytes, which are what the match returns
+                opens = "päss".encode("latin-1" if R <= 4 else "utf-8")
+                self.assertEqual(verify([b"a", "päss".encode()]), opens)
+                self.assertEqual(verify([b"b", opens]), opens)
+                self.assertEqual(verify([OWNER_PASSWORD.encode()]), OWNER_PASSWORD.encode())
+                self.assertIsNone(verify([b"pass", b""]))
+
+@unittest.skipUnless(pdf_hash.HAS_NUMBA, "needs Numba")
+class Rc4RoundsTest(unittest.TestCase):
+    def test_matches_arc4(self):
+        # 40- and 128-bit keys, over the 16-byte user check and the 32-byte /O entry
+        for key in (bytes(range(5)), bytes(range(100, 116))):
+            for data in (bytes(16), bytes(range(32))):
+                for descending in (False, True):
+                    with self.subTest(key_length=len(key), size=len(data), descending=descending):
+                        self.assertEqual(pdf_hash._rc4_rounds(key, data, descending),
+                                         pdf_hash._rc4_rounds_python(key, data, descending))
+
+if __name__ == "__main__":
+    unittest.main()